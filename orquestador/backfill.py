@@ -0,0 +1,214 @@
+# -------------------------------------------------------------------------------------
+#  Autor: Marco Espinoza — Consultor
+# Laboratorio de Prospectiva, Innovación e Inteligencia Artificial
+# Fecha: 18-10-2026
+# Descripción del archivo: Carga histórica completa de los indicadores del catálogo
+# -------------------------------------------------------------------------------------
+
+# ======== Librerias ========
+import argparse
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, datetime
+from typing import List, Optional
+
+import polars as pl
+from sqlalchemy import text
+
+from sample.concurrency import AdaptiveConcurrency
+from sample.helpers import get_engine
+from sample.retry import RunBudget
+from sample.utils import logger
+from sample.windows import PLANNER, fetch_range
+from sample.writer import CrudoBulkWriter
+
+# ======== LOGGER para los errores ========
+get_logger=logger("orquestador","orquestador.log")
+
+
+class backfillorchestrator:
+    """
+    Orquestador de la carga histórica completa de los indicadores de `bccr_sch.catalogo`.
+
+    Cada indicador se divide en unidades de trabajo (indicador, ventana) según su periodicidad.
+    Las unidades se descargan en paralelo respetando la cuota de la API, se cargan con COPY y
+    se registran en `bccr_sch.backfill_progreso`; al reiniciar se saltan las ya terminadas.
+
+    ...
+    Atributos
+    ----------
+    desde : date
+        Fecha de inicio para indicadores sin `fecha_inicio` en el catálogo.
+    indicadores : list[str]
+        Limita la carga a estos códigos (opcional).
+
+    Métodos
+    ----------
+    orchConn = backfillorchestrator()
+        Abre la conexión y crea la tabla de avance si no existe.
+    orchConn.readData()
+        Lee el catálogo con el rango histórico de cada indicador.
+    orchConn.TidyJob()
+        Devuelve las unidades (indicador, ventana) pendientes.
+    orchConn.run()
+        Corre la carga histórica.
+    """
+    def __init__(self, desde: date = date(1950, 1, 1), indicadores: Optional[List[str]] = None):
+        self.engine = get_engine()
+        self.desde = desde
+        self.indicadores = indicadores
+
+        with open("./orquestador/sql/backfill_progreso.sql", "r") as f:
+            ddl = f.read()
+        with self.engine.begin() as conn:
+            conn.execute(text(ddl))
+
+    def readData(self) -> pl.DataFrame:
+        """
+        Lee el catálogo con el rango de fechas de cada indicador.
+        """
+        with open("./orquestador/sql/catalogo_backfill.sql", "r") as f:
+            query = f.read()
+
+        data = pl.read_database(query=query, connection=self.engine)
+
+        if self.indicadores:
+            data = data.filter(pl.col("codigo_indicador").is_in(self.indicadores))
+
+        return data
+
+    def _completadas(self) -> pl.DataFrame:
+        return pl.read_database(
+            query="""
+                select codigo_indicador, ventana_inicio, ventana_fin
+                from bccr_sch.backfill_progreso
+            """,
+            connection=self.engine,
+            schema_overrides={"ventana_inicio": pl.Date, "ventana_fin": pl.Date},
+        )
+
+    def TidyJob(self) -> pl.DataFrame:
+        """
+        Planifica todas las unidades (indicador, ventana) y descarta las que ya están cubiertas
+        por una unidad terminada en una corrida anterior.
+        """
+        catalogo = self.readData()
+        hoy = date.today()
+
+        unidades = []
+        for row in catalogo.iter_rows(named=True):
+            inicio = row["fecha_inicio"] or self.desde
+            final = min(row["fecha_final"] or hoy, hoy)
+            for v_inicio, v_fin in PLANNER.plan(row["codigo_indicador"], inicio, final, row["periodicidad"]):
+                unidades.append((row["codigo_indicador"], row["periodicidad"], v_inicio, v_fin))
+
+        plan = pl.DataFrame(
+            unidades,
+            schema={
+                "codigo_indicador": pl.Utf8,
+                "periodicidad": pl.Utf8,
+                "ventana_inicio": pl.Date,
+                "ventana_fin": pl.Date,
+            },
+            orient="row",
+        )
+
+        # Una unidad está terminada si alguna ventana registrada la cubre por completo
+        cubiertas = (
+            plan.join(self._completadas(), on="codigo_indicador", suffix="_hecha")
+            .filter(
+                (pl.col("ventana_inicio_hecha") <= pl.col("ventana_inicio"))
+                & (pl.col("ventana_fin_hecha") >= pl.col("ventana_fin"))
+            )
+            .select("codigo_indicador", "ventana_inicio", "ventana_fin")
+            .unique()
+        )
+        pendientes = plan.join(cubiertas, on=["codigo_indicador", "ventana_inicio", "ventana_fin"], how="anti")
+
+        get_logger.info(
+            "Carga histórica: %d unidades planificadas, %d pendientes.",
+            plan.height, pendientes.height,
+        )
+        return pendientes.sort("codigo_indicador", "ventana_inicio")
+
+    def run(self, max_workers: int = 8, presupuesto: Optional[float] = None):
+        """
+        Descarga las unidades pendientes en paralelo y las carga por lotes a `indicador_crudo`.
+        Con `presupuesto` (segundos) la corrida se corta al agotarse; lo pendiente queda para la próxima.
+        """
+        data = self.TidyJob()
+        budget = RunBudget(presupuesto) if presupuesto else None
+        run_id = str(uuid.uuid4())
+        limiter = AdaptiveConcurrency(inicial=min(4, max_workers), maximo=max_workers)
+
+        def _marcar(indicador, v_inicio, v_fin, filas):
+            def _callback(cur):
+                cur.execute(
+                    """
+                    insert into bccr_sch.backfill_progreso
+                        (codigo_indicador, ventana_inicio, ventana_fin, filas, ingestion_run_id)
+                    values (%s, %s, %s, %s, %s)
+                    on conflict do nothing
+                    """,
+                    (indicador, v_inicio, v_fin, filas, run_id),
+                )
+            return _callback
+
+        def _tarea(row: dict) -> int:
+            df = fetch_range(
+                row["codigo_indicador"],
+                row["ventana_inicio"],
+                row["ventana_fin"],
+                periodicidad=row["periodicidad"],
+                max_workers=1,
+                limiter=limiter,
+                budget=budget,
+            )
+            df = df.with_columns(
+                pl.lit(run_id).alias("ingestion_run_id"),
+                pl.lit(datetime.now()).alias("extraccion_en"),
+                pl.lit(row["codigo_indicador"]).alias("codigo_indicador"),
+            )
+            writer.add(
+                df,
+                on_flush=_marcar(row["codigo_indicador"], row["ventana_inicio"], row["ventana_fin"], df.height),
+                # La ventana queda sin marcar y se vuelve a pedir en la próxima carga
+                on_error=lambda error: get_logger.error(
+                    "Falló la carga de %s %s — %s: %s",
+                    row["codigo_indicador"], row["ventana_inicio"], row["ventana_fin"], error,
+                ),
+            )
+            return df.height
+
+        with CrudoBulkWriter() as writer, ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futuros = {pool.submit(_tarea, row): row for row in data.iter_rows(named=True)}
+
+            for futuro in as_completed(futuros):
+                row = futuros[futuro]
+                try:
+                    filas = futuro.result()
+                    get_logger.debug(
+                        "%s %s — %s: %d filas",
+                        row["codigo_indicador"], row["ventana_inicio"], row["ventana_fin"], filas,
+                    )
+                except Exception as e:
+                    get_logger.error(
+                        "Error con %s %s — %s: %s",
+                        row["codigo_indicador"], row["ventana_inicio"], row["ventana_fin"], e,
+                    )
+
+        get_logger.info("Carga histórica %s terminada: %d filas escritas.", run_id, writer.total_rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Carga histórica completa desde bccr_sch.catalogo")
+    parser.add_argument("--workers", type=int, default=8, help="Solicitudes simultáneas máximas")
+    parser.add_argument("--desde", type=date.fromisoformat, default=date(1950, 1, 1),
+                        help="Fecha de inicio para indicadores sin fecha_inicio (AAAA-MM-DD)")
+    parser.add_argument("--indicadores", nargs="*", help="Códigos de indicador a cargar (por defecto todos)")
+    parser.add_argument("--presupuesto", type=float, help="Tiempo máximo de la corrida en segundos")
+    args = parser.parse_args()
+
+    backfillorchestrator(desde=args.desde, indicadores=args.indicadores).run(
+        max_workers=args.workers, presupuesto=args.presupuesto
+    )
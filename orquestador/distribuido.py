@@ -0,0 +1,187 @@
+# -------------------------------------------------------------------------------------
+#  Autor: Marco Espinoza — Consultor
+# Laboratorio de Prospectiva, Innovación e Inteligencia Artificial
+# Fecha: 18-10-2026
+# Descripción del archivo: Reparto de la actualización entre varios procesos o máquinas
+# -------------------------------------------------------------------------------------
+
+# ======== Librerias ========
+import argparse
+import multiprocessing
+import os
+import socket
+import uuid
+from typing import List, Optional, Sequence, Tuple
+
+import polars as pl
+
+from orquestador.unificado import VENTANAS_SEMANAS, cadenceorchestrator
+from sample.curation import IncrementalLoader
+from sample.pipeline import ingest_pipeline
+from sample.retry import BccrDeadlineError, RunBudget
+from sample.utils import logger
+from sample.workqueue import WorkQueue
+from sample.writer import BulkWriteError, CrudoBulkWriter
+
+# ======== LOGGER para los errores ========
+get_logger=logger("orquestador","orquestador.log")
+
+
+class queueorchestrator(cadenceorchestrator):
+    """
+    Versión distribuida de `cadenceorchestrator`: las unidades de `TidyJob()` se encolan en
+    `bccr_sch.cola_trabajo` y cualquier cantidad de workers (procesos o máquinas) las
+    reclaman por lotes sin pisarse.
+
+    ...
+    Atributos
+    ----------
+    cola : str
+        Nombre de la cola compartida.
+    lease : float
+        Segundos de arriendo de cada lote; si el worker muere, el lote vuelve a la cola.
+
+    Métodos
+    ----------
+    orchConn = queueorchestrator(cola="cadencias")
+        Abre la conexión y crea la tabla de la cola si no existe.
+    orchConn.encolar()
+        Encola los indicadores pendientes.
+    orchConn.trabajar()
+        Procesa lotes de la cola hasta vaciarla.
+    """
+
+    def __init__(
+            self,
+            cadencias: Optional[Sequence[str]] = None,
+            solo_pendientes: bool = True,
+            cola: str = "cadencias",
+            lease: float = 600.0,
+        ):
+        super().__init__(cadencias=cadencias, solo_pendientes=solo_pendientes)
+        self.queue = WorkQueue(cola=cola, lease=lease)
+
+    def encolar(self) -> int:
+        """
+        Encola la salida de `TidyJob()`. Devuelve la cantidad de unidades nuevas.
+        """
+        return self.queue.enqueue(self.TidyJob())
+
+    def trabajar(
+            self,
+            max_workers: int = 4,
+            lote: int = 20,
+            presupuesto: Optional[float] = None,
+            curar: bool = False,
+        ) -> int:
+        """
+        Reclama y procesa lotes de la cola hasta que no quede trabajo disponible.
+
+        :param max_workers: solicitudes simultáneas máximas de este worker.
+        :param lote: unidades por reclamo.
+        :param presupuesto: tiempo máximo del worker en segundos (opcional).
+        :param curar: si es True, cada lote cargado se cura de inmediato (incremental).
+        Devuelve la cantidad de unidades procesadas.
+        """
+        worker = f"{socket.gethostname()}-{os.getpid()}"
+        run_id = str(uuid.uuid4())
+        budget = RunBudget(presupuesto) if presupuesto else None
+        procesadas = 0
+
+        with CrudoBulkWriter() as writer:
+            while budget is None or budget.remaining() > 0:
+                data = self.queue.claim(worker, lote)
+                if data.is_empty():
+                    break
+
+                # Los resultados vuelven por código de indicador: si un lote trae dos ventanas del
+                # mismo indicador, la segunda se devuelve a la cola para otro reclamo
+                repetidas = data.filter(~pl.col("codigo_indicador").is_first_distinct())
+                self.queue.release(repetidas["id"].to_list(), worker)
+                data = data.unique("codigo_indicador", keep="first", maintain_order=True)
+
+                ids = dict(zip(data["codigo_indicador"], data["id"]))
+                intentos: List[Tuple[str, bool]] = []
+
+                pipeline = ingest_pipeline(
+                    writer,
+                    run_id=run_id,
+                    max_workers=max_workers,
+                    budget=budget,
+                    # La unidad queda `done` con el COPY que carga sus filas, o vuelve a la cola si falla
+                    on_flush_for=lambda indicador, filas, ids=ids: self.queue.on_done([ids[indicador]], worker),
+                    on_error_for=lambda indicador, ids=ids: lambda error: self.queue.fail(ids[indicador], error, worker),
+                )
+
+                # El arriendo del lote se renueva en segundo plano hasta que su COPY termina
+                with self.queue.heartbeat(worker, list(ids.values())):
+                    for unidad in pipeline.run(data.iter_rows(named=True)):
+                        indicador, df, error = unidad["row"]["codigo_indicador"], unidad["df"], unidad["error"]
+
+                        if error is not None:
+                            get_logger.error("Worker %s — error con %s: %s", worker, indicador, error)
+                            if isinstance(error, BccrDeadlineError):
+                                self.queue.release([ids[indicador]], worker)
+                            else:
+                                self.queue.fail(ids[indicador], error, worker)
+                            continue
+
+                        intentos.append((indicador, not df.is_empty()))
+                        procesadas += 1
+
+                    # Cada lote queda cargado antes de reclamar el siguiente; si el COPY falla, sus
+                    # unidades ya volvieron a la cola con on_error
+                    try:
+                        writer.flush()
+                    except BulkWriteError as err:
+                        get_logger.error("Worker %s — falló la carga del lote: %s", worker, err)
+                self._registrar_intentos(intentos)
+                if curar:
+                    IncrementalLoader().run()
+
+        get_logger.info("Worker %s terminado: %d unidades, %d filas.", worker, procesadas, writer.total_rows)
+        return procesadas
+
+
+def _worker(cadencias, cola, lease, max_workers, lote, presupuesto, curar) -> None:
+    """Punto de entrada de cada proceso worker."""
+    queueorchestrator(cadencias=cadencias, cola=cola, lease=lease).trabajar(
+        max_workers=max_workers, lote=lote, presupuesto=presupuesto, curar=curar
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Actualización distribuida con una cola en PostgreSQL")
+    parser.add_argument("accion", choices=["encolar", "trabajar"],
+                        help="encolar: carga la cola desde TidyJob(); trabajar: procesa la cola")
+    parser.add_argument("--cadencias", nargs="*", choices=list(VENTANAS_SEMANAS),
+                        help="Cadencias a encolar (por defecto todas)")
+    parser.add_argument("--todos", action="store_true",
+                        help="Encola todos los indicadores, aunque no se espere un dato nuevo")
+    parser.add_argument("--cola", default="cadencias", help="Nombre de la cola")
+    parser.add_argument("--lease", type=float, default=600.0, help="Segundos de arriendo de cada lote")
+    parser.add_argument("--procesos", type=int, default=1, help="Procesos worker en esta máquina")
+    parser.add_argument("--workers", type=int, default=4, help="Solicitudes simultáneas por proceso")
+    parser.add_argument("--lote", type=int, default=20, help="Unidades por reclamo")
+    parser.add_argument("--presupuesto", type=float, help="Tiempo máximo de cada worker en segundos")
+    parser.add_argument("--curar", action="store_true", help="Cura cada lote cargado (incremental)")
+    args = parser.parse_args()
+
+    if args.accion == "encolar":
+        queueorchestrator(cadencias=args.cadencias, solo_pendientes=not args.todos, cola=args.cola).encolar()
+    elif args.procesos <= 1:
+        _worker(args.cadencias, args.cola, args.lease, args.workers, args.lote, args.presupuesto, args.curar)
+    else:
+        # spawn: cada proceso arma su propio engine y su propia sesión HTTP
+        ctx = multiprocessing.get_context("spawn")
+        procesos = [
+            ctx.Process(
+                target=_worker,
+                args=(args.cadencias, args.cola, args.lease, args.workers, args.lote, args.presupuesto, args.curar),
+            )
+            for _ in range(args.procesos)
+        ]
+        for p in procesos:
+            p.start()
+        for p in procesos:
+            p.join()
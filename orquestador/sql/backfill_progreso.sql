@@ -0,0 +1,12 @@
+-- Registro de las unidades (indicador, ventana) ya cargadas por la carga histórica.
+-- Se llena en la misma transacción del COPY a indicador_crudo, así un reinicio nunca
+-- marca como terminada una ventana que no quedó escrita.
+create table if not exists bccr_sch.backfill_progreso (
+	codigo_indicador  text not null,
+	ventana_inicio    date not null,
+	ventana_fin       date not null,
+	filas             integer not null,
+	ingestion_run_id  uuid not null,
+	completado_en     timestamptz not null default now(),
+	constraint pk_backfill_progreso primary key (codigo_indicador, ventana_inicio, ventana_fin)
+);
@@ -0,0 +1,8 @@
+-- Indicadores del catálogo con su rango histórico completo, para la carga histórica (backfill)
+select
+	c.codigo as codigo_indicador,
+	c.periodicidad,
+	c.fecha_inicio,
+	c.fecha_final
+from bccr_sch.catalogo c
+order by c.codigo
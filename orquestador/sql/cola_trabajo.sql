@@ -0,0 +1,25 @@
+-- Cola de trabajo compartida por los workers del orquestador (varios procesos o máquinas).
+-- Cada fila es una unidad (indicador, ventana). Un worker la reclama con
+-- `for update skip locked` y la arrienda hasta `lease_hasta`. Si el worker muere,
+-- al vencer el arriendo la unidad vuelve a estar disponible para otro.
+create table if not exists bccr_sch.cola_trabajo (
+	id                bigserial primary key,
+	cola              text not null,
+	codigo_indicador  text not null,
+	periodicidad      text,
+	fecha_inicio      text not null,
+	fecha_final       text not null,
+	estado            text not null default 'pending'
+		check (estado in ('pending', 'leased', 'done', 'failed')),
+	intentos          integer not null default 0,
+	worker            text,
+	lease_hasta       timestamptz,
+	error             text,
+	creado_en         timestamptz not null default now(),
+	actualizado_en    timestamptz not null default now(),
+	constraint uq_cola_trabajo unique (cola, codigo_indicador, fecha_inicio, fecha_final)
+);
+
+create index if not exists ix_cola_trabajo_disponibles
+	on bccr_sch.cola_trabajo (cola, id)
+	where estado in ('pending', 'leased');
@@ -0,0 +1,38 @@
+-- Últimas observaciones de cada indicador de las cadencias solicitadas, con la fecha en que
+-- apareció cada una por primera vez (su primera revisión), no la de la última corrida que la tocó.
+-- Los puntos cuya primera aparición viene de la carga histórica se descartan: su extracción
+-- dice cuándo se corrió el backfill, no cuándo los publicó el BCCR.
+-- Usa los índices (indicador_key, date_key) de fct_indicador y fct_indicador_revision:
+-- cuesta O(indicadores * {N}).
+select
+	di.codigo_indicador,
+	r.fecha,
+	r.extraccion_en
+from curado_sch.indicador_watermark w
+join curado_sch.dim_indicador di
+	on w.indicador_key = di.indicador_key
+cross join lateral (
+	select df.fecha, p.valid_from as extraccion_en
+	from curado_sch.fct_indicador fi
+	join curado_sch.dim_fecha df
+		on fi.date_key = df.date_key
+	cross join lateral (
+		select rv.valid_from, rv.valid_from_run_key
+		from curado_sch.fct_indicador_revision rv
+		where rv.indicador_key = fi.indicador_key
+		  and rv.date_key = fi.date_key
+		order by rv.valid_from
+		limit 1
+	) p
+	join curado_sch.dim_run dr
+		on p.valid_from_run_key = dr.run_key
+	where fi.indicador_key = w.indicador_key
+	  and not exists (
+		select 1
+		from bccr_sch.backfill_progreso bp
+		where bp.ingestion_run_id = dr.ingestion_run_id
+	  )
+	order by fi.date_key desc
+	limit {N}
+) r
+where di.periodicidad in ({CADENCIAS})
@@ -1,29 +1,17 @@
-with cte as (select 
-	df.date_key,
-	di.indicador_key,
-	dr.run_key,
-	dr.ingestion_run_id,
+-- Última versión cargada de cada indicador de las cadencias solicitadas.
+-- Se lee de la marca de agua (una fila por indicador) en lugar de recorrer fct_indicador.
+-- {CADENCIAS} se reemplaza por la lista de periodicidades, p. ej. 'Diaria', 'Mensual'
+select
 	di.codigo_indicador,
 	di.nombre_indicador,
-	di.titulocuadro,
 	di.cuadro,
-	di.descripcion_indicador, 
+	di.titulocuadro,
 	di.periodicidad,
-	df.fecha
-from curado_sch.fct_indicador fi 
-left join curado_sch.dim_fecha df 
-	on fi.date_key = df.date_key
-left join curado_sch.dim_run dr 
-	on fi.last_run_key = dr.run_key 
-left join curado_sch.dim_indicador di 
-	on fi.indicador_key = di.indicador_key
-where di.periodicidad = '{CADENCE}'
-)select 
-	distinct codigo_indicador,
-	nombre_indicador,
-	cuadro,
-	titulocuadro,
-	max(fecha) as ultima_version
-from cte
-group by codigo_indicador, nombre_indicador, cuadro, titulocuadro
-
+	max(w.ultima_fecha) as ultima_version,
+	max(w.ultimo_intento) as ultimo_intento,
+	min(w.intentos_vacios) as intentos_vacios
+from curado_sch.indicador_watermark w
+join curado_sch.dim_indicador di
+	on w.indicador_key = di.indicador_key
+where di.periodicidad in ({CADENCIAS})
+group by di.codigo_indicador, di.nombre_indicador, di.cuadro, di.titulocuadro, di.periodicidad
@@ -0,0 +1,15 @@
+-- Registra en la marca de agua cada consulta a la API de la corrida y si devolvió datos.
+update curado_sch.indicador_watermark w
+set ultimo_intento = now(),
+	ultima_respuesta_con_datos = case
+		when i.con_datos then now()
+		else w.ultima_respuesta_con_datos
+	end,
+	intentos_vacios = case
+		when i.con_datos then 0
+		else w.intentos_vacios + 1
+	end
+from curado_sch.dim_indicador di
+join unnest(cast(:codigos as text[]), cast(:con_datos as boolean[])) as i(codigo_indicador, con_datos)
+	on i.codigo_indicador = di.codigo_indicador
+where w.indicador_key = di.indicador_key
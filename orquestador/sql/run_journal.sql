@@ -0,0 +1,21 @@
+-- Bitácora de las corridas del orquestador: una fila por unidad (indicador, ventana) y corrida.
+-- Estados: planned -> fetched -> written | failed. El paso a written ocurre en la misma
+-- transacción del COPY a indicador_crudo, así `--resume` nunca salta datos no escritos.
+create table if not exists bccr_sch.run_journal (
+	ingestion_run_id  uuid not null,
+	codigo_indicador  text not null,
+	periodicidad      text,
+	fecha_inicio      text not null,
+	fecha_final       text not null,
+	estado            text not null default 'planned'
+		check (estado in ('planned', 'fetched', 'written', 'failed')),
+	filas             integer,
+	error             text,
+	creado_en         timestamptz not null default now(),
+	actualizado_en    timestamptz not null default now(),
+	constraint pk_run_journal primary key (ingestion_run_id, codigo_indicador)
+);
+
+create index if not exists ix_run_journal_pendientes
+	on bccr_sch.run_journal (ingestion_run_id)
+	where estado <> 'written';
@@ -0,0 +1,275 @@
+# -------------------------------------------------------------------------------------
+#  Autor: Marco Espinoza — Consultor
+# Laboratorio de Prospectiva, Innovación e Inteligencia Artificial
+# Fecha: 18-10-2026
+# Descripción del archivo: Orquestador único para todas las cadencias de actualización
+# -------------------------------------------------------------------------------------
+
+# ======== Librerias ========
+import argparse
+import polars as pl
+from typing import Dict, List, Optional, Sequence, Tuple
+from sqlalchemy import text
+from sample.utils import logger
+from sample.helpers import get_engine
+from sample.core import BccrRateLimitError
+from sample.retry import BccrDeadlineError, RunBudget
+from sample.pipeline import ingest_pipeline
+from sample.writer import CrudoBulkWriter
+from sample.scheduler import PublicationScheduler
+from sample.journal import RunJournal
+from sample.curation import IncrementalLoader
+
+# ======== LOGGER para los errores ========
+get_logger=logger("orquestador","orquestador.log")
+
+# Semanas que se piden después de la última versión, según la periodicidad del indicador
+VENTANAS_SEMANAS: Dict[str, int] = {
+    "Diaria": 1,
+    "Semanal": 12,
+    "Mensual": 5,
+    "Trimestral": 14,
+    "Anual": 53,
+}
+
+
+class cadenceorchestrator:
+    """
+    Orquestador de la extracción de los indicadores de todas las cadencias en una sola pasada.
+
+    Con una sola lectura a la base de datos obtiene la última versión de cada indicador de las
+    cadencias solicitadas, calcula su ventana de consulta según `VENTANAS_SEMANAS` y alimenta un
+    único flujo de extracción y escritura, con un solo pool de conexiones y una sola sesión HTTP.
+
+    ...
+    Atributos
+    ----------
+    cadencias : Sequence[str]
+        Periodicidades a actualizar. Por defecto todas las de `VENTANAS_SEMANAS`.
+    solo_pendientes : bool
+        Si es True (por defecto) solo se consultan los indicadores cuya próxima publicación
+        ya debería haber ocurrido (ver `PublicationScheduler`).
+
+    Métodos
+    ----------
+    orchConn = cadenceorchestrator()
+        Abre la conexión
+    orchConn.readData()
+        Lee los indicadores de las cadencias solicitadas con su última versión.
+    orchConn.TidyJob()
+        Devuelve los indicadores con las fechas nuevas por actualizarse.
+    orchConn.run()
+        Corre la actualización de los indicadores.
+    orchConn.run(resume="ultima")
+        Reanuda la última corrida interrumpida con las unidades que no quedaron escritas.
+    """
+
+    # Las subclases por cadencia (diario.py, semanal.py, ...) solo fijan este atributo
+    CADENCIAS: Sequence[str] = tuple(VENTANAS_SEMANAS)
+
+    def __init__(self, cadencias: Optional[Sequence[str]] = None, solo_pendientes: bool = True):
+        self.engine = get_engine()
+        self.cadencias = tuple(cadencias or self.CADENCIAS)
+        self.solo_pendientes = solo_pendientes
+
+        desconocidas = set(self.cadencias) - set(VENTANAS_SEMANAS)
+        if desconocidas:
+            raise ValueError(f"Cadencias sin ventana definida: {sorted(desconocidas)}")
+
+    def readData(self) -> pl.DataFrame:
+        """
+        Lee la base de datos de acuerdo al query estipulado en la carpeta del orquestador.
+        Devuelve la última versión de cada indicador de las cadencias solicitadas.
+        """
+
+        # Leemos el archivo predeterminado para el query
+        with open("./orquestador/sql/query.sql", "r") as f:
+            query = f.read()
+
+        # Las cadencias son constantes de VENTANAS_SEMANAS, no entrada del usuario
+        cadencias = ", ".join(f"'{c}'" for c in self.cadencias)
+        query = query.format(CADENCIAS=cadencias)
+
+        # Extraemos la base de datos
+        data = pl.read_database(query=query,
+                                     connection=self.engine
+                                     )
+
+        return data
+
+    def readHistorial(self, n: int = 24) -> pl.DataFrame:
+        """
+        Lee las últimas `n` observaciones de cada indicador para el programador de publicaciones.
+        """
+        # El historial descarta las corridas de la carga histórica; su registro debe existir
+        # aunque nunca se haya corrido un backfill.
+        with open("./orquestador/sql/backfill_progreso.sql", "r") as f:
+            ddl = f.read()
+        with self.engine.begin() as conn:
+            conn.execute(text(ddl))
+
+        with open("./orquestador/sql/historial_publicacion.sql", "r") as f:
+            query = f.read()
+
+        cadencias = ", ".join(f"'{c}'" for c in self.cadencias)
+        query = query.format(CADENCIAS=cadencias, N=int(n))
+
+        return pl.read_database(query=query, connection=self.engine)
+
+    def TidyJob(self) -> pl.DataFrame:
+        """
+        Ingresa la cantidad de indicadores por cadencia en los logs y
+        devuelve el DataFrame final con las fechas actualizadas de consulta.
+        """
+
+        data = self.readData()
+
+        # Descartamos los indicadores que todavía no deberían tener un dato nuevo publicado
+        if self.solo_pendientes:
+            data = PublicationScheduler().due(data, self.readHistorial())
+
+        # La siguiente transformación nos dice cuantos indicadores hay en lista por cadencia
+        conteo = (
+            data
+            .group_by("periodicidad")
+            .agg(pl.col("codigo_indicador").n_unique().alias("TotalIndicadores"))
+            .sort("periodicidad")
+        )
+        for row in conteo.iter_rows(named=True):
+            get_logger.debug(
+                f"En la lista existen: {row['TotalIndicadores']} indicadores con cadencia {row['periodicidad']} por actualizarse."
+            )
+
+        ventanas = pl.DataFrame(
+            {
+                "periodicidad": list(VENTANAS_SEMANAS),
+                "semanas": list(VENTANAS_SEMANAS.values()),
+            }
+        )
+
+        ind = (
+            data
+            .join(ventanas, on="periodicidad", how="inner")
+            .with_columns(
+                (pl.col("ultima_version") + pl.duration(days=1)).alias("fecha_inicio"), # Agregamos un dia a la fecha de inicio basado en la ultima version
+                (pl.col("ultima_version") + pl.duration(weeks=pl.col("semanas"))).alias("fecha_final"), # Agregamos la ventana de la cadencia
+                )
+            .select(
+                pl.col("codigo_indicador"),
+                pl.col("periodicidad"),
+                pl.col("fecha_inicio").dt.strftime("%d/%m/%Y"),
+                pl.col("fecha_final").dt.strftime("%d/%m/%Y"),
+            )
+            .sort("codigo_indicador", descending=False)
+            )
+
+        return ind
+
+    def _registrar_intentos(self, intentos: List[Tuple[str, bool]]) -> None:
+        """
+        Actualiza `ultimo_intento` y `ultima_respuesta_con_datos` en la marca de agua.
+        """
+        if not intentos:
+            return
+
+        with open("./orquestador/sql/registrar_intentos.sql", "r") as f:
+            query = f.read()
+
+        codigos, con_datos = zip(*intentos)
+        with self.engine.begin() as conn:
+            conn.execute(text(query), {"codigos": list(codigos), "con_datos": list(con_datos)})
+
+    def run(
+            self,
+            max_workers: int = 8,
+            presupuesto: Optional[float] = None,
+            resume: Optional[str] = None,
+            curar: bool = False,
+        ):
+        """
+        Corre el trabajo de extraer los indicadores y almacenarlos en la base de datos
+        transaccional de PostgreSQL.
+
+        :param max_workers: solicitudes simultáneas máximas a la API.
+        :param presupuesto: tiempo máximo de la corrida en segundos (opcional).
+        :param resume: `ingestion_run_id` a reanudar, o "ultima" para la más reciente con pendientes.
+        :param curar: si es True, al terminar lleva lo nuevo de `indicador_crudo` a `curado_sch`.
+        """
+
+        # -- Bitácora de la corrida: al reanudar solo se repiten las unidades no escritas
+        if resume is not None:
+            journal = RunJournal.resume(None if resume == "ultima" else resume)
+            data = journal.pendientes()
+        else:
+            data = self.TidyJob()
+            journal = RunJournal()
+            journal.plan(data)
+
+        # -- Presupuesto de tiempo total de la corrida (segundos), para no pasarse del horario de la cadencia
+        budget = RunBudget(presupuesto) if presupuesto else None
+        # -- (indicador, ¿devolvió datos?) de cada consulta hecha a la API
+        intentos: List[Tuple[str, bool]] = []
+
+        # -- Pipeline descarga → normalización → validación → escritura con colas acotadas:
+        # -- mientras unos hilos esperan a la API, el lote anterior ya se está cargando con COPY.
+        # -- La concurrencia de descarga se ajusta sola según los 429 de la API.
+        with CrudoBulkWriter() as writer:
+            pipeline = ingest_pipeline(
+                writer,
+                run_id=journal.run_id,
+                max_workers=max_workers,
+                budget=budget,
+                on_fetched=lambda indicador: journal.mark(indicador, "fetched"),
+                on_flush_for=journal.on_written,
+                # Si el COPY del lote falla, todas sus unidades quedan `failed` en el journal
+                on_error_for=lambda indicador: lambda error: journal.mark(indicador, "failed", error),
+            )
+
+            for unidad in pipeline.run(data.iter_rows(named=True)):
+                indicador, df, error = unidad["row"]["codigo_indicador"], unidad["df"], unidad["error"]
+
+                if isinstance(error, BccrDeadlineError):
+                    get_logger.error("Presupuesto agotado antes de procesar %s: %s", indicador, error)
+                    journal.mark(indicador, "failed", error)
+                    continue
+
+                if isinstance(error, BccrRateLimitError):
+                    get_logger.error("Rate limit agotado para %s: %s", indicador, error)
+                    journal.mark(indicador, "failed", error)
+                    continue
+
+                if error is not None:
+                    get_logger.error("Error con %s: %s", indicador, error)
+                    journal.mark(indicador, "failed", error)
+                    continue
+
+                intentos.append((indicador, not df.is_empty()))
+                if df.is_empty():
+                    get_logger.info("Sin datos nuevos para %s", indicador)
+
+        self._registrar_intentos(intentos)
+        get_logger.info("Corrida %s terminada: %s", journal.run_id, journal.resumen())
+
+        # -- Curación incremental: solo las filas crudas que llegaron desde la última carga
+        if curar:
+            IncrementalLoader().run()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Actualiza los indicadores de todas las cadencias en una pasada")
+    parser.add_argument("--cadencias", nargs="*", choices=list(VENTANAS_SEMANAS),
+                        help="Cadencias a actualizar (por defecto todas)")
+    parser.add_argument("--workers", type=int, default=8, help="Solicitudes simultáneas máximas")
+    parser.add_argument("--presupuesto", type=float, help="Tiempo máximo de la corrida en segundos")
+    parser.add_argument("--todos", action="store_true",
+                        help="Consulta todos los indicadores, aunque no se espere un dato nuevo")
+    parser.add_argument("--resume", nargs="?", const="ultima", metavar="RUN_ID",
+                        help="Reanuda una corrida interrumpida (por defecto la más reciente con pendientes)")
+    parser.add_argument("--curar", action="store_true",
+                        help="Al terminar, carga lo nuevo a las tablas dim y fct (curación incremental)")
+    args = parser.parse_args()
+
+    cadenceorchestrator(cadencias=args.cadencias, solo_pendientes=not args.todos).run(
+        max_workers=args.workers, presupuesto=args.presupuesto, resume=args.resume,
+        curar=args.curar,
+    )
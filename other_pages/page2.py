@@ -7,11 +7,15 @@
 
 # -- Primero se importan las dependencias
 import streamlit as st 
-import plotly.express as px
-from sample.helpers import database_conn # -- Traemos esta clase que establece la conexión con la base de datos
-import polars as pl
+import plotly.graph_objects as go
+from sample.helpers import database_conn, downsample_minmax # -- Traemos esta clase que establece la conexión con la base de datos
 # --
 
+# -- Ancho aproximado del gráfico en píxeles: la serie se reduce a unos 4 puntos por píxel
+ANCHO_GRAFICO = 1200
+# -- Filas por página de la tabla de datos
+FILAS_POR_PAGINA = 100
+
 # -- Cuerpo del código
 
 #-- CONEXION BASE DE DATOS
@@ -42,45 +46,95 @@ with tab1:
         "Seleccione un indicador para comenzar",
         options=indicadores,
     )
-    # -- Filtramos la base de datos de acuerdo a la selección, esta forma es más sencilla
-    # -- Ya que traer la tabla completa en un query no es muy eficiente
+    # -- La etiqueta es "código - nombre"; la consulta se hace solo por código con parámetros enlazados
+    codigo_indicador = select_box.split(" - ", 1)[0]
+
+    # -- El título sale de la fila resumen del indicador, sin traer la serie completa
+    result = conn.load_resumen(codigo_indicador)
+
+    if not result or result["min_date"] is None:
+        st.warning("El indicador seleccionado todavía no tiene datos cargados.")
+    else:
+        with st.container(border=True):
+            # -- Título dinámico del gráfico
+            st.subheader(
+                f"{result['indicador']}: Serie {result['periodicidad']} {result['min_date'].strftime('%d/%m/%Y')} — {result['max_date'].strftime('%d/%m/%Y')}"
+            )
+            st.markdown("Unidad de medida: Colón Costarricense")
+
+            # -- Rango de fechas: se envía al WHERE de la consulta, así solo viaja el tramo elegido
+            desde, hasta = result["min_date"], result["max_date"]
+            if desde < hasta:
+                desde, hasta = st.slider(
+                    "Rango de fechas",
+                    min_value=desde,
+                    max_value=hasta,
+                    value=(desde, hasta),
+                    format="DD/MM/YYYY",
+                )
+            mrt_indicadores_disp = conn.load_indicador_data(codigo_indicador, desde=desde, hasta=hasta)
+
+            # -- Al acercarse, el tramo elegido se vuelve a reducir con más detalle
+            serie = downsample_minmax(
+                mrt_indicadores_disp,
+                x="Fecha de emisión",
+                y="Valor de Indicador",
+                ancho=ANCHO_GRAFICO,
+            )
+
+            # -- Las columnas pasan a plotly como arreglos de numpy, sin copiar la tabla a pandas
+            fig = go.Figure(
+                go.Scatter(
+                    x=serie["Fecha de emisión"].to_numpy(),
+                    y=serie["Valor de Indicador"].to_numpy(),
+                    mode="lines+markers" if serie.height <= ANCHO_GRAFICO // 4 else "lines",
+                )
+            )
+            fig.update_layout(xaxis_title="Fecha de emisión", yaxis_title="Valor de Indicador")
+            # Presentamos el grafico
+            st.plotly_chart(fig, width='stretch')
 
-    mrt_indicadores_disp = conn.load_indicador_data(select_box)
 
-    with st.container(border=True):
-        tabla_desc = mrt_indicadores_disp.sort("Fecha de emisión", descending=True)
-
-        # -- Algunas transformaciones utilizando la libreria de Polars
-        result = (
-            tabla_desc.select(
-                pl.col("Nombre de indicador").first().alias("indicador"),
-                pl.col("Fecha de emisión").min().alias("min_date"),
-                pl.col("Fecha de emisión").max().alias("max_date"),
-                pl.col("Periodicidad").first().alias("periodicidad")
-                )
-                ).to_dicts()[0]
-        # -- Título dinámico del gráfico
-        st.subheader(
-            f"{result['indicador']}: Serie {result['periodicidad']} {result['min_date'].strftime('%d/%m/%Y')} — {result['max_date'].strftime('%d/%m/%Y')}"
-        )
-        st.markdown("Unidad de medida: Colón Costarricense")
-        fig = px.line(
-            tabla_desc.to_pandas(),
-            x="Fecha de emisión",
-            y="Valor de Indicador",
-            markers=True
-        )
-        # Presentamos el grafico
-        st.plotly_chart(fig, width='stretch')
-
-
-    # Sección para la descarga de los datos
-    st.subheader("Descargue los datos")
-    with st.container(border=True):
-        st.markdown("""
-        Esta tabla muestra los metadatos correspondientes al indicador seleccionado. Puede descargarla haciendo clic en “Download as CSV” en la esquina superior derecha.
-        """)
-        st.dataframe(tabla_desc)
+        # Sección para la descarga de los datos
+        st.subheader("Descargue los datos")
+        with st.container(border=True):
+            st.markdown("""
+            Esta tabla muestra los datos del indicador seleccionado en el rango de fechas elegido, por páginas. Puede descargar el rango completo con el botón “Descargar CSV”.
+            """)
+
+            # -- Paginación por llave: cada página empieza después de la última fila (fecha, versión) de la anterior.
+            # -- Se guardan los cursores de las páginas visitadas para poder volver.
+            clave = (codigo_indicador, desde, hasta)
+            if st.session_state.get("pagina_clave") != clave:
+                st.session_state.pagina_clave = clave
+                st.session_state.cursores = [None]
+            cursores = st.session_state.cursores
+
+            pagina = conn.load_indicador_pagina(
+                codigo_indicador, desde=desde, hasta=hasta, antes_de=cursores[-1], filas=FILAS_POR_PAGINA
+            )
+            st.dataframe(pagina.drop("indicador_key"))
+
+            col1, col2, col3 = st.columns([1, 2, 1])
+            with col1:
+                if st.button("Anterior", disabled=len(cursores) == 1):
+                    cursores.pop()
+                    st.rerun()
+            with col2:
+                st.caption(f"Página {len(cursores)}")
+            with col3:
+                if st.button("Siguiente", disabled=pagina.height < FILAS_POR_PAGINA):
+                    cursores.append((pagina["Fecha de emisión"][-1], pagina["indicador_key"][-1]))
+                    st.rerun()
+
+            # -- El CSV se arma solo al hacer clic (descarga diferida), no en cada rerun de la página
+            st.download_button(
+                "Descargar CSV",
+                data=lambda: conn.load_indicador_data(codigo_indicador, desde=desde, hasta=hasta).write_csv(),
+                file_name=f"indicador_{codigo_indicador}.csv",
+                mime="text/csv",
+                on_click="ignore",
+            )
 
 with tab2:
     with st.container(border=True):
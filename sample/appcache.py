@@ -0,0 +1,199 @@
+# -------------------------------------------------------------------------------------
+#  Autor: Marco Espinoza — Consultor
+# Laboratorio de Prospectiva, Innovación e Inteligencia Artificial
+# Fecha: 18-10-2026
+# Descripción del archivo: caché LRU del app invalidada por las cargas nuevas a curado_sch
+# -------------------------------------------------------------------------------------
+
+import functools
+import inspect
+import select
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Set, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from sample.utils import logger
+
+get_logger = logger("AppCache", "appcache.log")
+
+# Canal que notifican las cargas de hechos al terminar (carga_datos.sql, carga_incremental.sql)
+CANAL = "bccr_curado"
+
+
+class VersionedLRU:
+    """
+    Caché LRU acotada para los loaders del app, versionada por `curado_sch.dim_run.run_key`.
+
+    Cada entrada lleva una etiqueta: el código (o la llave) del indicador que contiene, o
+    ninguna si depende de todo el mart (por ejemplo la lista de indicadores). Cuando aparece
+    una corrida nueva solo se invalidan las entradas de los indicadores cuya marca de agua
+    avanzó, más las entradas globales.
+
+    La señal de datos nuevos llega por `LISTEN bccr_curado`. Sin el listener, por ejemplo con
+    otro motor, se consulta `max(run_key)` como mucho cada `poll_interval` segundos.
+
+    ...
+
+    Atributos
+    ----------
+    engine : Engine
+        Engine del app.
+    maxsize : int
+        Entradas máximas; al pasarse se descarta la usada hace más tiempo.
+    poll_interval : float
+        Segundos mínimos entre consultas de `max(run_key)`.
+    """
+
+    def __init__(self, engine: Engine, maxsize: int = 64, poll_interval: float = 30.0, listen: bool = True) -> None:
+        self.engine = engine
+        self.maxsize = maxsize
+        self.poll_interval = poll_interval
+
+        self._datos: "OrderedDict[Hashable, Tuple[Any, Set[Hashable]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._run_key: Optional[int] = None
+        self._ultimo_poll = 0.0
+        self._aviso = threading.Event()
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidaciones = 0
+
+        if listen and engine.url.get_backend_name() == "postgresql":
+            threading.Thread(target=self._escuchar, name="appcache-listen", daemon=True).start()
+
+    # ---- Señal de datos nuevos
+
+    def _escuchar(self) -> None:
+        """
+        Hilo que espera `NOTIFY bccr_curado` en una conexión propia (fuera del pool).
+        """
+        while True:
+            try:
+                raw = self.engine.raw_connection()
+                raw.detach()
+                conn = raw.driver_connection
+                conn.autocommit = True
+                with conn.cursor() as cur:
+                    cur.execute(f"LISTEN {CANAL}")
+                get_logger.debug("Escuchando el canal %s", CANAL)
+
+                while True:
+                    if select.select([conn], [], [], 60) == ([], [], []):
+                        continue
+                    conn.poll()
+                    if conn.notifies:
+                        conn.notifies.clear()
+                        self._aviso.set()
+            except Exception as err:
+                get_logger.warning("Listener de %s caído (%s); se reintenta en 60 s", CANAL, err)
+                time.sleep(60)
+
+    def _refrescar(self) -> None:
+        """
+        Si hay una corrida nueva, invalida las entradas de los indicadores que cambiaron.
+        """
+        ahora = time.monotonic()
+        if not self._aviso.is_set() and ahora - self._ultimo_poll < self.poll_interval:
+            return
+        self._aviso.clear()
+        self._ultimo_poll = ahora
+
+        with self.engine.connect() as conn:
+            run_key = conn.execute(text("select coalesce(max(run_key), 0) from curado_sch.dim_run")).scalar()
+            if self._run_key is None:
+                self._run_key = run_key
+                return
+            if run_key <= self._run_key:
+                return
+
+            cambios = conn.execute(text(
+                """
+                select w.indicador_key, di.codigo_indicador
+                from curado_sch.indicador_watermark w
+                join curado_sch.dim_indicador di
+                    on w.indicador_key = di.indicador_key
+                where w.last_run_key > :desde
+                """
+            ), {"desde": self._run_key}).all()
+
+        etiquetas: Set[Hashable] = {None}
+        for key, codigo in cambios:
+            etiquetas.update({("key", int(key)), codigo})
+
+        with self._lock:
+            vencidas = [k for k, (_, tags) in self._datos.items() if tags & etiquetas]
+            for k in vencidas:
+                del self._datos[k]
+            self.invalidaciones += len(vencidas)
+            self._run_key = run_key
+
+        get_logger.info(
+            "Corrida %d: %d indicadores con datos nuevos, %d entradas invalidadas",
+            run_key, len(cambios), len(vencidas),
+        )
+
+    # ---- Caché
+
+    def get_or_load(self, clave: Hashable, etiquetas: Set[Hashable], cargar: Callable[[], Any]) -> Any:
+        try:
+            self._refrescar()
+        except Exception as err:
+            get_logger.warning("No se pudo revisar la versión de los datos: %s", err)
+
+        with self._lock:
+            if clave in self._datos:
+                self._datos.move_to_end(clave)
+                self.hits += 1
+                return self._datos[clave][0]
+            self.misses += 1
+
+        valor = cargar()
+
+        with self._lock:
+            self._datos[clave] = (valor, etiquetas)
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.maxsize:
+                self._datos.popitem(last=False)
+        return valor
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidaciones": self.invalidaciones,
+                "entradas": len(self._datos),
+                "run_key": self._run_key or 0,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._datos.clear()
+
+
+def versioned_cache(get_cache: Callable[[], VersionedLRU], serie: Optional[Callable[..., Set[Hashable]]] = None) -> Callable:
+    """
+    Decorador para los métodos de `database_conn`: guarda el resultado en la caché que
+    devuelve `get_cache()`. `serie(**argumentos)` recibe los argumentos de la llamada por
+    nombre, ya enlazados a la firma del método, y da las etiquetas de la entrada (por ejemplo
+    el código del indicador); sin `serie`, la entrada se invalida con cada corrida.
+    """
+    def decorador(fn: Callable) -> Callable:
+        firma = inspect.signature(fn)
+
+        @functools.wraps(fn)
+        def envoltura(self, *args, **kwargs):
+            argumentos = firma.bind(self, *args, **kwargs)
+            argumentos.apply_defaults()
+            nombrados = dict(list(argumentos.arguments.items())[1:])
+
+            clave = (fn.__qualname__, tuple(nombrados.items()))
+            etiquetas = serie(**nombrados) if serie is not None else {None}
+            return get_cache().get_or_load(clave, etiquetas, lambda: fn(self, *args, **kwargs))
+        return envoltura
+    return decorador
@@ -0,0 +1,235 @@
+# -------------------------------------------------------------------------------------
+#  Autor: Marco Espinoza — Consultor
+# Laboratorio de Prospectiva, Innovación e Inteligencia Artificial
+# Fecha: 18-10-2026
+# Descripción del archivo: caché en disco de las respuestas HTTP de la API del BCCR
+# -------------------------------------------------------------------------------------
+
+import hashlib
+import json
+import os
+import time
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, Optional
+from uuid import uuid4
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from sample.utils import logger
+
+get_logger = logger("Cache", "cache.log")
+
+# Vigencia de una respuesta según la periodicidad del indicador (segundos)
+TTL_POR_PERIODICIDAD: Dict[str, int] = {
+    "Diaria": 6 * 3600,
+    "Semanal": 24 * 3600,
+    "Mensual": 3 * 24 * 3600,
+    "Trimestral": 7 * 24 * 3600,
+    "Anual": 14 * 24 * 3600,
+}
+TTL_POR_DEFECTO = 6 * 3600
+# Rangos que terminaron hace más de un año solo cambian por revisiones
+TTL_HISTORICO = 30 * 24 * 3600
+# Un rango que termina dentro de este margen todavía puede recibir publicaciones atrasadas
+# (rezago de hasta un trimestre): se revalida siempre en lugar de servirse desde disco
+DIAS_RANGO_ABIERTO = 92
+
+MODOS = ("off", "on", "replay")
+
+
+class CacheMissError(LookupError):
+    """Se lanzó en modo replay cuando la respuesta solicitada no está en la caché."""
+    pass
+
+
+class _CacheTee:
+    """
+    Lector que entrega el cuerpo de la respuesta a quien lo consume (el parser) y a la vez lo
+    copia a `<hash>.body.<id>.tmp`. La entrada se publica solo cuando el cuerpo se leyó completo,
+    así una descarga cortada nunca deja una entrada a medias; al cerrarse sin llegar al final,
+    el `.tmp` se borra.
+    """
+
+    def __init__(self, raw, body_path: Path, publicar) -> None:
+        self.raw = raw
+        if hasattr(raw, "decode_content"):
+            raw.decode_content = True  # gzip / deflate se descomprimen al leer
+        self._body_path = body_path
+        # Un nombre por lector: dos descargas de la misma llave no comparten (ni borran) el mismo .tmp
+        self._tmp_path = body_path.with_name(f"{body_path.name}.{uuid4().hex[:8]}.tmp")
+        self._tmp = open(self._tmp_path, "wb")
+        self._publicar = publicar
+        self._fin = False
+
+    def read(self, n: int = -1) -> bytes:
+        data = self.raw.read(n if n is not None and n >= 0 else None)
+        if data:
+            self._tmp.write(data)
+        elif n != 0 and not self._fin:  # read(0) no es fin del cuerpo (ijson lo usa para ver el tipo)
+            self._fin = True
+            self._tmp.close()
+            os.replace(self._tmp_path, self._body_path)
+            self._publicar()
+        return data
+
+    def release_conn(self) -> None:
+        liberar = getattr(self.raw, "release_conn", None)
+        if liberar is not None:
+            liberar()
+
+    def close(self) -> None:
+        """
+        Cierra la respuesta. Si el cuerpo no se leyó hasta el final (corte de red, error al
+        parsear) la copia parcial se borra: no hay entrada que publicar.
+        """
+        try:
+            if not self._fin:
+                self._tmp.close()
+                self._tmp_path.unlink(missing_ok=True)
+        finally:
+            self.raw.close()
+
+
+class ResponseCache:
+    """
+    Caché en disco de respuestas de la API, direccionada por el hash de la URL
+    (que incluye indicador y rango de fechas).
+
+    Cada entrada guarda el cuerpo en `<hash>.body` y los metadatos (ETag, Last-Modified,
+    Content-Type, vigencia) en `<hash>.json`. Las entradas vencidas se revalidan con
+    `If-None-Match` / `If-Modified-Since` cuando el servidor entregó esos encabezados.
+
+    ...
+
+    Atributos
+    ----------
+    directory : Path
+        Carpeta de la caché; por defecto `BCCR_CACHE_DIR` o `./.cache/bccr`.
+    mode : str
+        `off` (no se usa), `on` (lee y escribe) o `replay` (solo lee, nunca va a la red).
+    """
+
+    def __init__(
+            self,
+            directory: Optional[os.PathLike[str] | str] = None,
+            mode: str = "on",
+        ) -> None:
+
+        if mode not in MODOS:
+            raise ValueError(f"Modo de caché inválido: {mode}. Opciones: {MODOS}")
+
+        self.mode = mode
+        self.directory = Path(directory or os.getenv("BCCR_CACHE_DIR", ".cache/bccr"))
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    @classmethod
+    def from_env(cls) -> Optional["ResponseCache"]:
+        """
+        Construye la caché a partir de `BCCR_CACHE_MODE` (por defecto `on`). Devuelve None si es `off`.
+        """
+        mode = os.getenv("BCCR_CACHE_MODE", "on").lower()
+        if mode == "off":
+            return None
+        return cls(mode=mode)
+
+    @staticmethod
+    def ttl_for(periodicidad: Optional[str], fecha_final: Optional[date]) -> int:
+        """
+        Vigencia de una respuesta. Solo los rangos cerrados se sirven desde disco sin
+        consultar: un rango que llega a hoy (la ventana normal de las cadencias) o que terminó
+        hace menos de `DIAS_RANGO_ABIERTO` días tiene vigencia 0 y se revalida en cada
+        solicitud con ETag / Last-Modified.
+        """
+        hoy = date.today()
+        if fecha_final is None or fecha_final >= hoy - timedelta(days=DIAS_RANGO_ABIERTO):
+            return 0
+        if fecha_final < hoy - timedelta(days=365):
+            return TTL_HISTORICO
+        return TTL_POR_PERIODICIDAD.get(periodicidad or "", TTL_POR_DEFECTO)
+
+    @staticmethod
+    def key_for(url: str, params: Optional[dict] = None) -> str:
+        raw = url if not params else f"{url}?{json.dumps(params, sort_keys=True)}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _paths(self, key: str):
+        return self.directory / f"{key}.json", self.directory / f"{key}.body"
+
+    def lookup(self, key: str) -> Optional[dict]:
+        meta_path, body_path = self._paths(key)
+        if not meta_path.exists() or not body_path.exists():
+            return None
+        try:
+            return json.loads(meta_path.read_text(encoding="utf-8"))
+        except ValueError:
+            get_logger.warning("Entrada de caché corrupta, se ignora: %s", meta_path)
+            return None
+
+    @staticmethod
+    def is_fresh(meta: dict) -> bool:
+        return time.time() < meta["stored_at"] + meta["ttl"]
+
+    @staticmethod
+    def conditional_headers(meta: dict) -> Dict[str, str]:
+        headers = {}
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+        return headers
+
+    def load(self, key: str, meta: dict) -> requests.Response:
+        """
+        Reconstruye un `requests.Response` a partir de la entrada guardada. El cuerpo se lee
+        del archivo a medida que se consume (`resp.raw`), sin cargarlo completo en memoria.
+        """
+        _, body_path = self._paths(key)
+        resp = requests.Response()
+        resp.status_code = 200
+        resp.url = meta["url"]
+        resp.raw = open(body_path, "rb")
+        resp.headers = CaseInsensitiveDict({"Content-Type": meta.get("content_type", "")})
+        resp.encoding = "utf-8"
+        return resp
+
+    def store(self, key: str, url: str, resp: requests.Response, ttl: int) -> None:
+        """
+        Guarda la respuesta mientras se consume: reemplaza `resp.raw` por un lector que copia el
+        cuerpo a disco. Los metadatos, que vuelven visible la entrada, se escriben al terminar
+        de leer el cuerpo.
+        """
+        meta_path, body_path = self._paths(key)
+        meta = {
+            "url": url,
+            "etag": resp.headers.get("ETag"),
+            "last_modified": resp.headers.get("Last-Modified"),
+            "content_type": resp.headers.get("Content-Type", ""),
+            "stored_at": time.time(),
+            "ttl": ttl,
+        }
+
+        def publicar() -> None:
+            tmp_meta = meta_path.with_suffix(".json.tmp")
+            tmp_meta.write_text(json.dumps(meta), encoding="utf-8")
+            os.replace(tmp_meta, meta_path)
+
+        resp.raw = _CacheTee(resp.raw, body_path, publicar)
+
+    def discard(self, key: str) -> None:
+        """
+        Elimina una entrada; se usa con las respuestas sin datos, que no se guardan.
+        """
+        for path in self._paths(key):
+            path.unlink(missing_ok=True)
+
+    def refresh(self, key: str, meta: dict, ttl: int) -> None:
+        """
+        Renueva la vigencia de una entrada tras un 304 Not Modified.
+        """
+        meta_path, _ = self._paths(key)
+        meta = {**meta, "stored_at": time.time(), "ttl": ttl}
+        tmp_meta = meta_path.with_suffix(".json.tmp")
+        tmp_meta.write_text(json.dumps(meta), encoding="utf-8")
+        os.replace(tmp_meta, meta_path)
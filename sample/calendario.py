@@ -0,0 +1,52 @@
+# -------------------------------------------------------------------------------------
+#  Autor: Marco Espinoza — Consultor
+# Laboratorio de Prospectiva, Innovación e Inteligencia Artificial
+# Fecha: 18-10-2026
+# Descripción del archivo: generación del calendario de curado_sch.dim_fecha
+# -------------------------------------------------------------------------------------
+
+import argparse
+from datetime import date
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from sample.helpers import get_engine
+from sample.utils import logger
+
+get_logger = logger("Calendario", "calendario.log")
+
+
+def populate_calendar(
+        desde: date = date(1900, 1, 1),
+        hasta: date = date(2100, 12, 31),
+        engine: Optional[Engine] = None,
+    ) -> int:
+    """
+    Crea los atributos de calendario de `dim_fecha` (si faltan) y llena el rango
+    [`desde`, `hasta`] en un solo insert. Devuelve la cantidad de días escritos.
+    """
+    engine = engine or get_engine()
+
+    with open("./sql/calendario.sql", "r") as f:
+        ddl = f.read()
+
+    with engine.begin() as conn:
+        conn.execute(text(ddl))
+        dias = conn.execute(
+            text("select curado_sch.poblar_calendario(cast(:desde as date), cast(:hasta as date))"),
+            {"desde": desde, "hasta": hasta},
+        ).scalar()
+
+    get_logger.info("Calendario dim_fecha: %d días entre %s y %s", dias, desde, hasta)
+    return dias
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Genera el calendario de curado_sch.dim_fecha")
+    parser.add_argument("--desde", type=date.fromisoformat, default=date(1900, 1, 1), help="AAAA-MM-DD")
+    parser.add_argument("--hasta", type=date.fromisoformat, default=date(2100, 12, 31), help="AAAA-MM-DD")
+    args = parser.parse_args()
+
+    populate_calendar(args.desde, args.hasta)
@@ -0,0 +1,149 @@
+# -------------------------------------------------------------------------------------
+#  Autor: Marco Espinoza — Consultor
+# Laboratorio de Prospectiva, Innovación e Inteligencia Artificial
+# Fecha: 18-10-2026
+# Descripción del archivo: detección de cambios para no reinsertar puntos sin cambios en indicador_crudo
+# -------------------------------------------------------------------------------------
+
+import threading
+from typing import Optional
+
+import polars as pl
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from sample.helpers import get_engine
+from sample.utils import logger
+
+get_logger = logger("CDC", "cdc.log")
+
+# Último valor guardado de cada (indicador, fecha) dentro del rango; usa ix_indicador_raw_code_fecha.
+# Los puntos cuyas versiones crudas ya se archivaron (sample/maintenance.py) se toman del valor
+# curado en fct_indicador, para no tratarlos como nuevos al volver a descargarlos.
+_ULTIMOS_SQL = """
+with crudo as (
+	select distinct on (codigo_indicador, fecha)
+		codigo_indicador,
+		fecha,
+		"valorDatoPorPeriodo"
+	from bccr_sch.indicador_crudo
+	where codigo_indicador = any(:codigos)
+	  and fecha between :desde and :hasta
+	order by codigo_indicador, fecha, extraccion_en desc
+),
+curado as (
+	select
+		di.codigo_indicador,
+		d.fecha,
+		f.valorind as "valorDatoPorPeriodo"
+	from curado_sch.fct_indicador f
+	join curado_sch.dim_indicador di
+		on f.indicador_key = di.indicador_key
+	join curado_sch.dim_fecha d
+		on f.date_key = d.date_key
+	where di.codigo_indicador = any(:codigos)
+	  and f.date_key between :desde_key and :hasta_key
+)
+select * from crudo
+union all
+select c.*
+from curado c
+where not exists (
+	select 1
+	from crudo r
+	where r.codigo_indicador = c.codigo_indicador
+	  and r.fecha = c.fecha
+)
+"""
+
+
+class ChangeDetector:
+    """
+    Compara los puntos descargados con el último valor guardado en `bccr_sch.indicador_crudo`
+    (o en `curado_sch.fct_indicador` si sus versiones crudas se archivaron) y deja solo los
+    nuevos o revisados.
+
+    Cada punto se resume en un hash de (codigo_indicador, fecha, valor) redondeado a la escala
+    de `numeric(20,8)`; la comparación es un anti-join sobre esa columna.
+
+    ...
+
+    Atributos
+    ----------
+    engine : Engine
+        Engine de SQLAlchemy; por defecto el pool compartido de `get_engine()`.
+    decimales : int
+        Decimales con los que se comparan los valores (los de la columna en la base).
+    """
+
+    def __init__(self, engine: Optional[Engine] = None, decimales: int = 8) -> None:
+        self.engine = engine or get_engine()
+        self.decimales = decimales
+
+        self.filas_recibidas = 0
+        self.filas_nuevas = 0
+        self._lock = threading.Lock()
+
+    def _con_hash(self, df: pl.DataFrame) -> pl.DataFrame:
+        return df.with_columns(
+            pl.struct(
+                pl.col("codigo_indicador").cast(pl.Utf8),
+                pl.col("fecha").cast(pl.Date),
+                pl.col("valorDatoPorPeriodo").cast(pl.Float64).round(self.decimales),
+            ).hash(seed=0).alias("_hash")
+        )
+
+    def latest(self, df: pl.DataFrame) -> pl.DataFrame:
+        """
+        Último valor guardado de los indicadores de `df` en su rango de fechas: la versión cruda
+        más reciente o, si ya se archivó, el valor de `fct_indicador`.
+        """
+        rango = df.select(pl.col("fecha").min().alias("desde"), pl.col("fecha").max().alias("hasta")).row(0, named=True)
+        codigos = df["codigo_indicador"].unique().to_list()
+
+        with self.engine.connect() as conn:
+            filas = conn.execute(
+                text(_ULTIMOS_SQL),
+                {
+                    "codigos": codigos,
+                    "desde": rango["desde"],
+                    "hasta": rango["hasta"],
+                    "desde_key": int(rango["desde"].strftime("%Y%m%d")),
+                    "hasta_key": int(rango["hasta"].strftime("%Y%m%d")),
+                },
+            ).all()
+
+        return pl.DataFrame(
+            [(c, f, None if v is None else float(v)) for c, f, v in filas],
+            schema={"codigo_indicador": pl.Utf8, "fecha": pl.Date, "valorDatoPorPeriodo": pl.Float64},
+            orient="row",
+        )
+
+    def filter(self, df: pl.DataFrame) -> pl.DataFrame:
+        """
+        Devuelve las filas de `df` cuyo (indicador, fecha, valor) no es el último guardado.
+        """
+        if df.is_empty():
+            return df
+
+        guardados = self.latest(df)
+        cambios = (
+            self._con_hash(df)
+            .join(self._con_hash(guardados).select("_hash"), on="_hash", how="anti")
+            .drop("_hash")
+        )
+
+        with self._lock:
+            self.filas_recibidas += df.height
+            self.filas_nuevas += cambios.height
+
+        if cambios.height < df.height:
+            get_logger.debug(
+                "%s: %d de %d puntos sin cambios, no se reinsertan",
+                df["codigo_indicador"][0], df.height - cambios.height, df.height,
+            )
+        return cambios
+
+    def resumen(self) -> str:
+        with self._lock:
+            return f"{self.filas_nuevas} de {self.filas_recibidas} filas nuevas o revisadas"
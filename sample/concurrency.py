@@ -0,0 +1,111 @@
+# -------------------------------------------------------------------------------------
+#  Autor: Marco Espinoza — Consultor
+# Laboratorio de Prospectiva, Innovación e Inteligencia Artificial
+# Fecha: 18-10-2026
+# Descripción del archivo: limitador de concurrencia adaptativa para las descargas de la API
+# -------------------------------------------------------------------------------------
+
+import threading
+import time
+from typing import Optional
+
+from sample.utils import logger
+
+get_logger = logger("Concurrency", "concurrency.log")
+
+
+class AdaptiveConcurrency:
+    """
+    Limitador de concurrencia tipo AIMD (aumento aditivo, disminución multiplicativa).
+
+    Cada solicitud toma un cupo con `acquire()` y lo devuelve con `release()`. Cuando la API
+    responde 429 el límite se reduce a la mitad y se bloquean nuevos cupos durante el
+    `Retry-After`; tras una racha de respuestas exitosas el límite sube en uno.
+
+    ...
+
+    Atributos
+    ----------
+    inicial : int
+        Cantidad de solicitudes simultáneas con las que se arranca.
+    minimo : int
+        Límite inferior de concurrencia.
+    maximo : int
+        Límite superior de concurrencia (debe coincidir con el pool HTTP).
+    exitos_para_subir : int
+        Respuestas exitosas consecutivas necesarias para subir el límite en uno.
+    pausa_429 : float
+        Pausa por defecto cuando el servidor no envía `Retry-After`.
+    """
+
+    def __init__(
+            self,
+            inicial: int = 4,
+            minimo: int = 1,
+            maximo: int = 16,
+            exitos_para_subir: int = 5,
+            pausa_429: float = 20.0,
+        ) -> None:
+
+        if not 1 <= minimo <= inicial <= maximo:
+            raise ValueError("Se requiere 1 <= minimo <= inicial <= maximo")
+
+        self.minimo = minimo
+        self.maximo = maximo
+        self.exitos_para_subir = exitos_para_subir
+        self.pausa_429 = pausa_429
+
+        self._limite = inicial
+        self._activos = 0
+        self._racha = 0
+        self._pausa_hasta = 0.0
+        self._cond = threading.Condition()
+
+    @property
+    def limite(self) -> int:
+        return self._limite
+
+    def acquire(self) -> None:
+        with self._cond:
+            while True:
+                espera = self._pausa_hasta - time.monotonic()
+                if espera > 0:
+                    self._cond.wait(timeout=espera)
+                    continue
+                if self._activos < self._limite:
+                    self._activos += 1
+                    return
+                self._cond.wait()
+
+    def release(self) -> None:
+        with self._cond:
+            self._activos -= 1
+            self._cond.notify_all()
+
+    def on_success(self) -> None:
+        with self._cond:
+            self._racha += 1
+            if self._racha >= self.exitos_para_subir and self._limite < self.maximo:
+                self._limite += 1
+                self._racha = 0
+                get_logger.debug("Concurrencia aumentada a %d", self._limite)
+                self._cond.notify_all()
+
+    def on_rate_limited(self, retry_after: Optional[float] = None) -> None:
+        with self._cond:
+            self._racha = 0
+            nuevo = max(self.minimo, self._limite // 2)
+            if nuevo != self._limite:
+                get_logger.warning("429 recibido; concurrencia reducida de %d a %d", self._limite, nuevo)
+            self._limite = nuevo
+
+            pausa = self.pausa_429 if retry_after is None else retry_after
+            self._pausa_hasta = max(self._pausa_hasta, time.monotonic() + pausa)
+
+    def __enter__(self) -> "AdaptiveConcurrency":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.release()
+
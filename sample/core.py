@@ -14,11 +14,17 @@ from pathlib import Path
 from urllib.parse import urljoin
 from typing import Any, Dict, Optional
 import polars as pl
-from sample.helpers import PostgreSQLconn
+from sample.helpers import get_engine
+from sample.ratelimit import SharedTokenBucket
+from sample.cache import CacheMissError, ResponseCache
+from sample.parser import parse_series
+from sample.writer import CrudoBulkWriter
+from sample.retry import BREAKER, RetryPolicy, RunBudget
 from datetime import datetime
 from uuid import uuid4
-import json
 import time
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import DecodeError, HTTPError as Urllib3Error, TimeoutError as Urllib3Timeout
 
 get_logger = logger("Core", "core.log")
 
@@ -45,10 +51,17 @@ class BccrAPI:
 
     KEYS = ("url", "token")
     SESSION = requests.Session()
+    POOL_SIZE: int = 16
+    _ADAPTER: Optional[HTTPAdapter] = None
 
     BASE_URL: str | None = None
     TOKEN: str | None = None
+    RATE: float = 1.0
+    BURST: float = 4.0
     CONF_LOADED: bool = False
+    # El volcado de cada punto al log DEBUG solo se activa de forma explícita
+    DEBUG_PAYLOAD: bool = os.getenv("BCCR_DEBUG_PAYLOAD", "0") == "1"
+    RETRY_POLICY = RetryPolicy()
 
     def __init__(
             self,
@@ -59,18 +72,39 @@ class BccrAPI:
             conf_path: Optional[os.PathLike[str] | str] = None, 
             timeout: float = 20.0,
             session: Optional[requests.Session] = None,
+            limiter: Optional[Any] = None,
+            writer: Optional[Any] = None,
+            periodicidad: Optional[str] = None,
+            cache: Optional[ResponseCache] = None,
+            max_retries: Optional[int] = None,
+            retry_policy: Optional[RetryPolicy] = None,
+            budget: Optional[RunBudget] = None,
+            ingestion_run_id: Optional[str] = None,
         ) -> None:
 
         self.api_name = api_name
         self.timeout = timeout
+        # Reintentos: política compartida, presupuesto de la corrida y tope opcional de intentos
+        self.retry_policy = retry_policy or BccrAPI.RETRY_POLICY
+        self.budget = budget
+        self.max_retries = max_retries
         self.indicador = indicador
         self.fecha_inicio = fecha_inicio
         self.fecha_final = fecha_final
-        self.conn= PostgreSQLconn()
-        self.engine=self.conn.create_conn()
+        # Identificador de la corrida del orquestador; sin él, cada get() usa uno nuevo
+        self.ingestion_run_id = ingestion_run_id
+        # Engine compartido del proceso; cada escritura toma y devuelve una conexión del pool
+        self.engine = get_engine()
 
         # Shared HTTP session
         self.session = session or BccrAPI.SESSION
+        # Limitador de concurrencia opcional (ver sample.concurrency.AdaptiveConcurrency)
+        self.limiter = limiter
+        # Escritor por lotes opcional (ver sample.writer.CrudoBulkWriter); si no hay, get() usa uno propio
+        self.writer = writer
+        # Caché en disco de respuestas; la periodicidad define cuánto tiempo es válida una entrada
+        self.periodicidad = periodicidad
+        self.cache = cache if cache is not None else ResponseCache.from_env()
 
         # ============= CONFIG CARGA UNA SOLA VEZ ===================
         if not hasattr(BccrAPI, "CONF_LOADED") or not BccrAPI.CONF_LOADED:
@@ -101,6 +135,9 @@ class BccrAPI:
             # Store credentials globally (cached)
             BccrAPI.BASE_URL = config.get(api_name, "url")
             BccrAPI.TOKEN = config.get(api_name, "token")
+            # Opcionales: cuota de solicitudes por segundo compartida por todos los procesos del token
+            BccrAPI.RATE = config.getfloat(api_name, "rate", fallback=BccrAPI.RATE)
+            BccrAPI.BURST = config.getfloat(api_name, "burst", fallback=BccrAPI.BURST)
             BccrAPI.CONF_LOADED = True
 
             get_logger.info(
@@ -113,6 +150,11 @@ class BccrAPI:
         self.base_url = BccrAPI.BASE_URL
         self._token = BccrAPI.TOKEN
 
+        # Limitador compartido entre procesos que usan el mismo token
+        self.rate_limiter = SharedTokenBucket.for_token(
+            self._token, rate=BccrAPI.RATE, burst=BccrAPI.BURST
+        )
+
         # ========== DATE & ENDPOINT PROCESSING ==========
         self.fecha_inicio = datetime.strptime(self.fecha_inicio, '%d/%m/%Y').date()
         self.fecha_final = datetime.strptime(self.fecha_final, '%d/%m/%Y').date()
@@ -140,69 +182,277 @@ class BccrAPI:
             "Accept": "application/json"
         }
 
+    @classmethod
+    def configure_pool(cls, pool_size: int) -> None:
+        """
+        Dimensiona el pool de conexiones de la sesión HTTP compartida.
+        Debe ser al menos igual a la cantidad de hilos que llaman a la API en paralelo.
+
+        Solo monta un adaptador nuevo si el tamaño cambia; si no, la sesión conserva el pool
+        actual y las conexiones abiertas se siguen reutilizando entre corridas.
+        """
+        if cls._ADAPTER is not None and cls.POOL_SIZE == pool_size:
+            return
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        cls.SESSION.mount("https://", adapter)
+        cls.SESSION.mount("http://", adapter)
+        cls._ADAPTER = adapter
+        cls.POOL_SIZE = pool_size
+        get_logger.debug("Pool HTTP dimensionado a %d conexiones", pool_size)
+
+    def _fetch(self, url, params=None, timeout=None) -> requests.Response:
+        """
+        Resuelve la solicitud pasando primero por la caché en disco. La respuesta se pide con
+        `stream=True`: el cuerpo se lee a medida que el parser lo consume.
+
+        - Entrada vigente: se sirve desde disco sin ir a la red.
+        - Entrada vencida: se revalida con ETag / Last-Modified; un 304 renueva la entrada.
+        - Modo replay: solo se sirve desde disco y se lanza `CacheMissError` si no existe.
+        """
+        if self.cache is None:
+            return self._request_with_backoff(url=url, params=params, timeout=timeout, stream=True)
+
+        key = ResponseCache.key_for(url, params)
+        meta = self.cache.lookup(key)
+
+        if self.cache.mode == "replay":
+            if meta is None:
+                raise CacheMissError(f"Sin respuesta en caché para {url}")
+            get_logger.debug("Replay desde caché: %s", url)
+            return self.cache.load(key, meta)
+
+        if meta is not None and ResponseCache.is_fresh(meta):
+            get_logger.debug("Respuesta vigente en caché: %s", url)
+            return self.cache.load(key, meta)
+
+        ttl = ResponseCache.ttl_for(self.periodicidad, self.fecha_final)
+        extra = ResponseCache.conditional_headers(meta) if meta is not None else None
+        resp = self._request_with_backoff(url=url, params=params, timeout=timeout, extra_headers=extra, stream=True)
+
+        if resp.status_code == 304 and meta is not None:
+            get_logger.debug("304 Not Modified, se reutiliza la caché: %s", url)
+            resp.close()
+            self.cache.refresh(key, meta, ttl)
+            return self.cache.load(key, meta)
+
+        self.cache.store(key, url, resp, ttl)
+        return resp
+
+    @staticmethod
+    def _como_error_requests(e: Urllib3Error) -> requests.RequestException:
+        """
+        Traduce un error de urllib3 ocurrido al leer el cuerpo a la excepción de `requests`
+        equivalente, así lo manejan los mismos reintentos y la división de ventanas por timeout.
+        """
+        if isinstance(e, Urllib3Timeout):
+            return requests.ReadTimeout(e)
+        if isinstance(e, DecodeError):
+            return requests.exceptions.ContentDecodingError(e)
+        return requests.ConnectionError(e)
+
+    def _parse_json(self, response: requests.Response, url: str, params=None):
+        """
+        Recorre la respuesta JSON de forma incremental (ver `sample.parser.parse_series`)
+        directamente desde `response.raw`, que `_fetch` siempre deja sin consumir: la memoria
+        depende de las columnas resultantes y no del tamaño del JSON. Una respuesta sin datos
+        se quita de la caché: la próxima corrida debe consultar la API.
+
+        Un corte o timeout a mitad del cuerpo se lanza como `requests.ConnectionError` o
+        `requests.ReadTimeout`.
+        """
+        source = response.raw
+        if hasattr(source, "decode_content"):
+            source.decode_content = True  # gzip / deflate se descomprimen al leer
+
+        try:
+            meta, series_df = parse_series(source, debug_payload=BccrAPI.DEBUG_PAYLOAD)
+            # Lee lo que quede tras el cierre del JSON: la caché publica la entrada completa y la
+            # conexión vuelve al pool en lugar de cerrarse
+            while source.read(64 * 1024):
+                pass
+        except Urllib3Error as e:
+            get_logger.error("Lectura del cuerpo interrumpida desde %s: %s", url, e)
+            raise self._como_error_requests(e) from e
+        except ValueError as e:
+            get_logger.error("No se pudo parsear JSON desde %s: %s", url, e)
+            raise
+        finally:
+            response.close()
+
+        if meta["n_datos"] == 0 and self.cache is not None and self.cache.mode == "on":
+            self.cache.discard(ResponseCache.key_for(url, params))
+
+        get_logger.debug(
+            "Respuesta JSON recibida correctamente: %d puntos de %s",
+            series_df.height, meta["codigoIndicador"],
+        )
+        return meta, series_df
+
+    def _fetch_json(self, url, params=None, timeout=None):
+        """
+        `_fetch` seguido de `_parse_json`. El cuerpo se lee después de `_request_with_backoff`,
+        así que un corte a mitad de la lectura recibe aquí el mismo trato: cuenta para el
+        circuit breaker y se repite la solicitud según `self.retry_policy`.
+
+        Devuelve `(response, ctype, meta, series_df)`; `meta` y `series_df` son None si la
+        respuesta no es JSON.
+        """
+        policy = self.retry_policy
+        max_retries = self.max_retries or policy.max_retries
+
+        for attempt in range(1, max_retries + 1):
+            response = self._fetch(url=url, params=params, timeout=timeout)
+
+            # ---- Normalización del Content-Type (case-insensitive)
+            ctype = (response.headers.get("Content-Type", "") or "").lower().split(";")[0].strip()
+            get_logger.debug("Content-Type recibido: %s", ctype)
+            if not (ctype == "application/json" or ctype.endswith("+json")):
+                return response, ctype, None, None
+
+            try:
+                meta, series_df = self._parse_json(response, url, params)
+                return response, ctype, meta, series_df
+            except requests.RequestException as e:
+                kind = policy.classify_exception(e)
+                if kind is None or attempt == max_retries or (kind == "timeout" and not policy.retry_timeouts):
+                    raise
+                BREAKER.record_failure()
+                wait = policy.delay(attempt, kind)
+                get_logger.warning(
+                    "Reintentando tras %s al leer el cuerpo. Intento %s/%s. Esperando %.1f segundos.",
+                    kind, attempt, max_retries, wait,
+                )
+                self._wait(wait)
+
+    def _wait(self, seconds: float) -> None:
+        """
+        Espera respetando el presupuesto de la corrida, si existe.
+        """
+        if self.budget is not None:
+            self.budget.sleep(seconds)
+        else:
+            time.sleep(seconds)
+
     def _request_with_backoff(
         self,
         url,
         params=None,
         timeout=None,
-        max_retries: int = 3,         # menos reintentos
-        base_delay: float = 20.0,     # esperas más largas
+        max_retries: Optional[int] = None,  # por defecto self.max_retries o la política
+        extra_headers: Optional[Dict[str, str]] = None,
+        stream: bool = False,
     ):
+        """
+        Ejecuta la solicitud aplicando `self.retry_policy`: backoff exponencial con jitter
+        para 429, 5xx, timeouts y errores de conexión; el resto de errores se lanza de una vez.
+        Antes de cada intento se respeta el circuit breaker y el presupuesto de la corrida.
+        """
+        policy = self.retry_policy
         to = self.timeout if timeout is None else timeout
-        last_status = None
+        max_retries = max_retries or self.max_retries or policy.max_retries
+        headers = {**self.headers, **extra_headers} if extra_headers else self.headers
+        last_kind = None
 
         for attempt in range(1, max_retries + 1):
+
+            # Si la API está caída, todos los hilos esperan a que el circuito se cierre
+            pausa = BREAKER.wait_time()
+            if pausa > 0:
+                get_logger.warning("Circuito abierto; esperando %.1f segundos antes de llamar %s", pausa, url)
+                self._wait(pausa)
+
+            intento_to = to
+            if self.budget is not None:
+                self.budget.check()
+                intento_to = min(to, self.budget.remaining())
+
             try:
+                # Esperamos turno en la cuota compartida del token
+                self.rate_limiter.acquire(budget=self.budget)
+                if self.budget is not None:
+                    intento_to = min(to, self.budget.remaining())  # descontando la espera por la ficha
                 resp = self.session.get(
                     url,
-                    headers=self.headers,
+                    headers=headers,
                     params=params,
-                    timeout=to,
+                    timeout=intento_to,
+                    stream=stream,
                 )
+            except requests.RequestException as e:
+                kind = policy.classify_exception(e)
+                if kind is None:
+                    get_logger.error("Error de red al llamar %s: %s", url, e)
+                    raise
+                if kind == "timeout" and not policy.retry_timeouts:
+                    get_logger.warning("Timeout al llamar %s; se devuelve sin reintentar", url)
+                    raise
 
-                # --- Manejo específico de 429
-                if resp.status_code == 429:
-                    last_status = 429
-
-                    retry_after = resp.headers.get("Retry-After")
-                    if retry_after:
-                        try:
-                            wait = float(retry_after)
-                        except ValueError:
-                            wait = base_delay
-                    else:
-                        wait = base_delay
-
-                    get_logger.warning(
-                        "429 Too Many Requests al llamar %s. Intento %s/%s. "
-                        "Esperando %.1f segundos antes de reintentar.",
-                        url, attempt, max_retries, wait,
-                    )
-                    time.sleep(wait)
-                    continue  # intenta de nuevo
-
-                # Si no es 429, deja que raise_for_status maneje otros errores HTTP
-                resp.raise_for_status()
-                return resp
-
-            except requests.Timeout as e:
-                get_logger.error("Timeout al llamar %s: %s", url, e)
+                last_kind = kind
+                BREAKER.record_failure()
+                get_logger.error("Falla transitoria (%s) al llamar %s: %s", kind, url, e)
                 if attempt == max_retries:
                     raise
-                wait = base_delay
+
+                wait = policy.delay(attempt, kind)
                 get_logger.warning(
-                    "Reintentando tras timeout. Intento %s/%s. Esperando %.1f segundos.",
-                    attempt, max_retries, wait,
+                    "Reintentando tras %s. Intento %s/%s. Esperando %.1f segundos.",
+                    kind, attempt, max_retries, wait,
                 )
-                time.sleep(wait)
+                self._wait(wait)
+                continue
 
-            except requests.RequestException as e:
-                get_logger.error("Error de red al llamar %s: %s", url, e)
-                # Para otros errores de red, no tiene sentido reintentar infinito
-                raise
+            kind = policy.classify_status(resp.status_code)
+
+            # --- Manejo específico de 429
+            if kind == "rate_limit":
+                last_kind = kind
+
+                retry_after = resp.headers.get("Retry-After")
+                try:
+                    retry_after = float(retry_after) if retry_after else None
+                except ValueError:
+                    retry_after = None
+                wait = policy.delay(attempt, kind, retry_after)
+
+                get_logger.warning(
+                    "429 Too Many Requests al llamar %s. Intento %s/%s. "
+                    "Esperando %.1f segundos antes de reintentar.",
+                    url, attempt, max_retries, wait,
+                )
+                # Avisamos a los demás procesos y al limitador para que bajen el ritmo
+                self.rate_limiter.penalize(wait)
+                if self.limiter is not None:
+                    self.limiter.on_rate_limited(wait)
+                resp.close()
+                if attempt < max_retries:
+                    self._wait(wait)
+                continue
+
+            # --- 5xx transitorios
+            if kind == "server":
+                last_kind = kind
+                BREAKER.record_failure()
+                get_logger.error("HTTP %s al llamar %s", resp.status_code, url)
+                if attempt == max_retries:
+                    resp.raise_for_status()
+
+                wait = policy.delay(attempt, kind)
+                get_logger.warning(
+                    "Reintentando tras HTTP %s. Intento %s/%s. Esperando %.1f segundos.",
+                    resp.status_code, attempt, max_retries, wait,
+                )
+                resp.close()
+                self._wait(wait)
+                continue
+
+            # Cualquier otro error HTTP no se reintenta
+            resp.raise_for_status()
+            BREAKER.record_success()
+            self.rate_limiter.reward()
+            return resp
 
         # Si salimos del bucle porque se agotaron los reintentos:
-        if last_status == 429:
+        if last_kind == "rate_limit":
             raise BccrRateLimitError(f"Máximo de reintentos alcanzado para {url}")
         else:
             raise RuntimeError(f"Máximo de reintentos alcanzado para {url}")
@@ -224,40 +474,16 @@ class BccrAPI:
 
         get_logger.debug("GET %s params=%s", url, params)
 
-        # Ahora toda la lógica de reintentos / 429 / timeout vive en _request_with_backoff
-        response = self._request_with_backoff(url=url, params=params, timeout=to)
-
-        # ---- Normalización del Content-Type (case-insensitive)
-        ctype = (response.headers.get("Content-Type", "") or "").lower().split(";")[0].strip()
-        get_logger.debug("Content-Type recibido: %s", ctype)
+        # La caché vive en _fetch; la lógica de reintentos / 429 / timeout en _request_with_backoff
+        # y las validaciones del contrato se hacen mientras se recorre el JSON
+        response, ctype, meta, series_df = self._fetch_json(url=url, params=params, timeout=to)
 
         # ---- Rama JSON
-        if ctype == "application/json" or ctype.endswith("+json"):
-            try:
-                data = response.json()
-            except ValueError as e:
-                get_logger.error("No se pudo parsear JSON desde %s: %s", url, e)
-                raise
-
-            get_logger.debug(
-                "Respuesta JSON recibida correctamente. data=%s",
-                json.dumps(data, ensure_ascii=False)
-            )
-
-            # Validaciones defensivas del contrato
-            if not isinstance(data, dict):
-                raise TypeError(f"Respuesta inesperada (no es dict): {type(data)}")
-
-            if "datos" not in data:
-                raise KeyError("La respuesta JSON no contiene la clave 'datos'")
-
-            datos = data.get("datos")
-            if not isinstance(datos, list):
-                raise TypeError(f"'datos' no es una lista: {type(datos)}")
+        if meta is not None:
 
             # ---- Caso sin datos
-            if len(datos) == 0:
-                mensaje = data.get("mensaje") or "No existen datos para las fechas suministradas."
+            if meta["n_datos"] == 0:
+                mensaje = meta["mensaje"] or "No existen datos para las fechas suministradas."
                 get_logger.info("Sin datos para el rango solicitado: %s", mensaje)
 
                 empty_df = pl.DataFrame(
@@ -271,40 +497,23 @@ class BccrAPI:
                 )
                 return empty_df  # no escribe a DB
 
-            # ---- Hay datos: construimos indicador y series
-            indicador = datos[0]
-            series = indicador.get("series", [])
-            if not isinstance(series, list):
-                raise TypeError(f"'series' no es una lista: {type(series)}")
-
-            df = pl.DataFrame(
-                data=series,
-                schema=["fecha", "valorDatoPorPeriodo"]
-            ).with_columns([
-                pl.lit(indicador.get("codigoIndicador")).alias("codigo_indicador"),
-                pl.lit(indicador.get("nombreIndicador")).alias("nombre_indicador"),
+            # ---- Hay datos: la serie ya viene tipada (fecha: Date, valor: Float64)
+            df = series_df.with_columns([
+                pl.lit(meta["codigoIndicador"], dtype=pl.Utf8).alias("codigo_indicador"),
+                pl.lit(meta["nombreIndicador"], dtype=pl.Utf8).alias("nombre_indicador"),
+                pl.lit(self.ingestion_run_id or str(uuid4())).alias("ingestion_run_id"),
             ])
 
-            df = (
-                df
-                .with_columns([
-                    pl.lit(str(uuid4())).alias("ingestion_run_id"),
-                ])
-                .with_columns([
-                    pl.col("fecha").str.strptime(pl.Date, strict=False),
-                    pl.col("valorDatoPorPeriodo").cast(pl.Float64),
-                ])
-            )
-
             # Escribimos solo si hay filas
-            if df.height > 0:
-                df.write_database(
-                    table_name="bccr_sch.indicador_crudo",
-                    connection=self.engine,
-                    if_table_exists='append'
-                    # engine='sqlalchemy'
-                )
-                get_logger.info("Escritura completada: %d filas en indicador_crudo", df.height)
+            if df.height > 0 and self.writer is not None:
+                self.writer.add(df)
+                get_logger.info("%d filas agregadas al lote de escritura de indicador_crudo", df.height)
+            elif df.height > 0:
+                # Sin escritor de la corrida se usa uno propio: mismo COPY y misma detección de cambios
+                with CrudoBulkWriter(engine=self.engine) as writer:
+                    writer.add(df)
+                    filas = writer.flush()
+                get_logger.info("Escritura completada: %d de %d filas nuevas o revisadas en indicador_crudo", filas, df.height)
             else:
                 get_logger.info("DataFrame vacío tras normalización; no se escribe a DB.")
 
@@ -342,36 +551,14 @@ class BccrAPI:
         get_logger.debug("GET %s params=%s", url, params)
 
         # ---- Use backoff retry wrapper
-        response = self._request_with_backoff(url=url, params=params, timeout=to)
-
-        # ---- Normalize content type
-        ctype = (response.headers.get("Content-Type", "") or "").lower().split(";")[0].strip()
-        get_logger.debug("Content-Type recibido: %s", ctype)
+        response, ctype, meta, series_df = self._fetch_json(url=url, params=params, timeout=to)
 
         # ---- JSON response branch
-        if ctype == "application/json" or ctype.endswith("+json"):
-            try:
-                data = response.json()
-            except ValueError as e:
-                get_logger.error("No se pudo parsear JSON desde %s: %s", url, e)
-                raise
-
-            get_logger.debug("Respuesta JSON recibida correctamente. data=%s",
-                            json.dumps(data, ensure_ascii=False))
-
-            if not isinstance(data, dict):
-                raise TypeError(f"Respuesta inesperada (no es dict): {type(data)}")
-
-            if "datos" not in data:
-                raise KeyError("La respuesta JSON no contiene la clave 'datos'")
-
-            datos = data.get("datos")
-            if not isinstance(datos, list):
-                raise TypeError(f"'datos' no es una lista: {type(datos)}")
+        if meta is not None:
 
             # ---- No data condition
-            if len(datos) == 0:
-                mensaje = data.get("mensaje") or "No existen datos para las fechas suministradas."
+            if meta["n_datos"] == 0:
+                mensaje = meta["mensaje"] or "No existen datos para las fechas suministradas."
                 get_logger.info("Sin datos para el rango solicitado: %s", mensaje)
 
                 return pl.DataFrame(
@@ -384,18 +571,10 @@ class BccrAPI:
                 )
 
             # ---- Build standard DataFrame
-            indicador = datos[0]
-            series = indicador.get("series", [])
-
-            df = (
-                pl.DataFrame(series, schema=["fecha", "valorDatoPorPeriodo"])
-                .with_columns([
-                    pl.lit(indicador.get("codigoIndicador")).alias("codigo_indicador"),
-                    pl.lit(indicador.get("nombreIndicador")).alias("nombre_indicador"),
-                    pl.col("fecha").str.strptime(pl.Date, strict=False),
-                    pl.col("valorDatoPorPeriodo").cast(pl.Float64),
-                ])
-            )
+            df = series_df.with_columns([
+                pl.lit(meta["codigoIndicador"], dtype=pl.Utf8).alias("codigo_indicador"),
+                pl.lit(meta["nombreIndicador"], dtype=pl.Utf8).alias("nombre_indicador"),
+            ])
 
             return df
 
@@ -414,3 +593,4 @@ class BccrAPI:
         raise ValueError(f"Contenido no soportado: {ctype}")
 
 
+BccrAPI.configure_pool(BccrAPI.POOL_SIZE)
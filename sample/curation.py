@@ -0,0 +1,101 @@
+# -------------------------------------------------------------------------------------
+#  Autor: Marco Espinoza — Consultor
+# Laboratorio de Prospectiva, Innovación e Inteligencia Artificial
+# Fecha: 18-10-2026
+# Descripción del archivo: curación incremental de indicador_crudo a las tablas dim y fct
+# -------------------------------------------------------------------------------------
+
+import argparse
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from sample.helpers import get_engine
+from sample.utils import logger
+
+get_logger = logger("Curation", "curation.log")
+
+
+class IncrementalLoader:
+    """
+    Curación incremental de `bccr_sch.indicador_crudo` hacia `curado_sch`.
+
+    Procesa solo las filas con `crudo_id` mayor a la marca de agua de `curado_sch.carga_watermark`
+    y la avanza en la misma transacción, así el costo sigue a los datos nuevos y no al historial.
+    Se puede llamar justo después de cada lote de ingesta; varias llamadas simultáneas se
+    serializan con un advisory lock.
+
+    ...
+
+    Atributos
+    ----------
+    engine : Engine
+        Engine de SQLAlchemy; por defecto el pool compartido de `get_engine()`.
+    lote : int
+        Cantidad máxima de `crudo_id` por transacción, para acotar las transacciones largas.
+
+    Métodos
+    ----------
+    IncrementalLoader().run()
+        Cura todo lo pendiente y devuelve la cantidad de filas crudas procesadas.
+    """
+
+    # Llave del advisory lock que serializa las curaciones
+    LOCK_KEY = 0x6263_6372_0017
+
+    def __init__(self, engine: Optional[Engine] = None, lote: int = 1_000_000) -> None:
+        self.engine = engine or get_engine()
+        self.lote = lote
+
+        with open("./sql/carga_incremental.sql", "r") as f:
+            self.query = text(f.read())
+
+    def _tope(self) -> int:
+        """
+        Mayor `crudo_id` ya confirmado. El lock SHARE espera a que terminen los COPY en curso,
+        así ningún `crudo_id` menor al tope puede aparecer después y quedar fuera de la marca.
+        """
+        with self.engine.begin() as conn:
+            conn.execute(text("lock table bccr_sch.indicador_crudo in share mode"))
+            return conn.execute(text("select coalesce(max(crudo_id), 0) from bccr_sch.indicador_crudo")).scalar()
+
+    def run(self) -> int:
+        """
+        Cura las filas crudas pendientes por tramos de `lote` ids.
+        Devuelve la cantidad de filas crudas procesadas.
+        """
+        tope = self._tope()
+        procesadas = 0
+
+        while True:
+            with self.engine.begin() as conn:
+                conn.execute(text("select pg_advisory_xact_lock(:k)"), {"k": self.LOCK_KEY})
+                desde = conn.execute(text(
+                    """
+                    select ultimo_crudo_id
+                    from curado_sch.carga_watermark
+                    where proceso = 'fct_indicador'
+                    for update
+                    """
+                )).scalar() or 0
+
+                if desde >= tope:
+                    break
+
+                hasta = min(desde + self.lote, tope)
+                conn.execute(self.query, {"desde": desde, "hasta": hasta})
+                filas = conn.execute(text("select count(*) from tmp_crudo_nuevo")).scalar()
+
+            procesadas += filas
+            get_logger.info("Curación incremental: crudo_id %d — %d (%d filas)", desde + 1, hasta, filas)
+
+        return procesadas
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Curación incremental de indicador_crudo a curado_sch")
+    parser.add_argument("--lote", type=int, default=1_000_000, help="Máximo de crudo_id por transacción")
+    args = parser.parse_args()
+
+    IncrementalLoader(lote=args.lote).run()
@@ -8,14 +8,154 @@
 # Llamamos las dependencias
 import streamlit as st
 import polars as pl 
-from sqlalchemy import create_engine
+from sqlalchemy import bindparam, create_engine, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.sql.elements import TextClause
 from sample.utils import logger
+from sample.appcache import VersionedLRU, versioned_cache
 import os
+import threading
+from datetime import date, datetime, time
+from typing import Optional
 from dotenv import load_dotenv
 
 # Creamos una sección para los logs
 get_logger = logger("Helpers", "helpers.log")
 
+# Engine único por proceso, se crea la primera vez que se solicita
+_ENGINE: Optional[Engine] = None
+_ENGINE_LOCK = threading.Lock()
+
+
+def _build_engine(pool_size: Optional[int] = None) -> Engine:
+    """
+    Crea un engine con pool. El pool se dimensiona con las variables de entorno
+    `SQL_POOL_SIZE` (por defecto 10), `SQL_MAX_OVERFLOW` (5) y `SQL_POOL_RECYCLE`
+    (1800 segundos). Cada conexión se verifica con `pool_pre_ping` antes de prestarse,
+    así las conexiones cortadas por el túnel SSH se reemplazan en lugar de fallar la consulta.
+    """
+    load_dotenv()
+    return create_engine(
+        url=os.getenv("SQL_URL"),
+        pool_size=pool_size or int(os.getenv("SQL_POOL_SIZE", "10")),
+        max_overflow=int(os.getenv("SQL_MAX_OVERFLOW", "5")),
+        pool_recycle=int(os.getenv("SQL_POOL_RECYCLE", "1800")),
+        pool_pre_ping=True,
+    )
+
+
+def get_engine() -> Engine:
+    """
+    Devuelve el engine de SQLAlchemy compartido por todo el proceso, creándolo la primera vez.
+    """
+    global _ENGINE
+
+    if _ENGINE is None:
+        with _ENGINE_LOCK:
+            if _ENGINE is None:
+                _ENGINE = _build_engine()
+                get_logger.debug("Engine compartido creado con éxito.")
+
+    return _ENGINE
+
+
+@st.cache_resource(show_spinner=False)
+def get_app_engine() -> Engine:
+    """
+    Engine del app de Streamlit, administrado con `st.cache_resource`.
+
+    Se crea una sola vez por servidor y lo comparten todas las sesiones y reruns, incluso
+    cuando Streamlit vuelve a importar los módulos al recargar el código (lo que reiniciaría
+    el engine global de `get_engine()`). El pool se ajusta con `SQL_APP_POOL_SIZE` (por defecto 5).
+    """
+    load_dotenv()
+    engine = _build_engine(pool_size=int(os.getenv("SQL_APP_POOL_SIZE", "5")))
+    get_logger.debug("Engine del app creado con éxito.")
+    return engine
+
+
+@st.cache_resource(show_spinner=False)
+def get_app_cache() -> VersionedLRU:
+    """
+    Caché de los loaders del app, compartida por todas las sesiones. Guarda hasta
+    `APP_CACHE_SIZE` resultados (por defecto 64) y descarta los de los indicadores que
+    reciben datos nuevos en una curación (ver `sample/appcache.py`).
+    """
+    load_dotenv()
+    return VersionedLRU(
+        get_app_engine(),
+        maxsize=int(os.getenv("APP_CACHE_SIZE", "64")),
+        poll_interval=float(os.getenv("APP_CACHE_POLL", "30")),
+    )
+
+
+def _serie(codigo_indicador: Optional[str] = None, indicador_key: Optional[int] = None, **_) -> set:
+    """
+    Etiquetas de caché de un loader por indicador: su código o su llave. Recibe los argumentos
+    por nombre (ver `versioned_cache`), así los demás parámetros del loader se ignoran.
+    """
+    if indicador_key is not None:
+        return {("key", int(indicador_key))}
+    return {codigo_indicador}
+
+
+def dispose_engine() -> None:
+    """
+    Cierra todas las conexiones del pool compartido. Útil al final de un orquestador.
+    """
+    global _ENGINE
+
+    with _ENGINE_LOCK:
+        if _ENGINE is not None:
+            _ENGINE.dispose()
+            _ENGINE = None
+            get_logger.debug("Engine compartido cerrado.")
+
+
+def downsample_minmax(df: pl.DataFrame, x: str, y: str, ancho: int = 1000) -> pl.DataFrame:
+    """
+    Reduce una serie para graficarla en `ancho` píxeles sin perder su forma.
+
+    Reparte el eje `x` en `ancho` tramos de igual duración (uno por columna de píxeles) y
+    de cada tramo conserva el primer y el último punto, el mínimo y el máximo (M4). Así los
+    picos y las caídas se ven igual que con la serie completa, con a lo sumo `4 * ancho`
+    puntos. Todo se calcula con expresiones de Polars, sin recorrer la serie en Python.
+
+    ...
+    Atributos
+    ----------
+    df: pl.DataFrame
+        Serie con las columnas `x` (fecha) y `y` (valor).
+    x, y: str
+        Nombres de las columnas de fecha y valor.
+    ancho: int
+        Ancho del gráfico en píxeles.
+    """
+    df = df.sort(x)
+    if df.height <= 4 * ancho:
+        return df
+
+    t = pl.col(x).cast(pl.Int64)
+    conservar = (
+        df.with_row_index("_i")
+        .with_columns(((t - t.min()) * ancho // (t.max() - t.min() + 1)).alias("_tramo"))
+        .group_by("_tramo")
+        .agg(
+            pl.concat_list(
+                pl.col("_i").first(),
+                pl.col("_i").last(),
+                pl.col("_i").get(pl.col(y).arg_min()),
+                pl.col("_i").get(pl.col(y).arg_max()),
+            ).alias("_i")
+        )
+        .explode("_i")
+        .get_column("_i")
+        .unique()
+    )
+
+    return df.with_row_index("_i").filter(pl.col("_i").is_in(conservar)).drop("_i")
+
+
 class database_conn:
     """
     Clase que se encarga de la conexión con la base de datos de PostgreSQL en el servidor de CEPAL. 
@@ -31,20 +171,19 @@ class database_conn:
     Métodos
     ----------
     conn = database_conn()
-    result= conn.load_indicador_data(selectbox)
+    result= conn.load_indicador_data("317", desde=date(2020, 1, 1))
+    pagina = conn.load_indicador_pagina("317", antes_de=(date(2024, 1, 31), 12))
+    resumen = conn.load_resumen("317")
+    vintage = conn.load_vintage("317", date(2024, 1, 31))
+    conn.cache_stats()
+        {"hits": ..., "misses": ..., "invalidaciones": ..., "entradas": ..., "run_key": ...}
     
     """
     def __init__(self):
-        load_dotenv()
+        # Engine del app (st.cache_resource): los reruns solo piden y devuelven conexiones del pool
+        self.engine = get_app_engine()
 
-        self.url = os.getenv("SQL_URL")
-        self.engine = create_engine(
-            url=self.url
-        )
-        self.alchemy_conn = self.engine.connect()
-        get_logger.debug("Credenciales cargados con éxito.")
-
-    @st.cache_data
+    @versioned_cache(get_app_cache)
     def load_indicadores(_self):
         # Query para traer la lista de indicadores
         q = """
@@ -59,7 +198,7 @@ class database_conn:
             get_logger.debug("Ejecutando query solicitado...")
             data=pl.read_database(
                 query=q,
-                connection=_self.alchemy_conn).to_series()
+                connection=_self.engine).to_series()
             get_logger.debug("Query ejecutado correctamente.")
         except Exception as err:
             get_logger.error(f"Error inesperado: {err=} {type(err)=}")
@@ -68,36 +207,216 @@ class database_conn:
         return data
 
 
-    @st.cache_data
-    def load_indicador_data(_self, raw_value: str):
+    @versioned_cache(get_app_cache, serie=_serie)
+    def indicador_keys(_self, codigo_indicador: str) -> list[int]:
+        """
+        Llaves de `dim_indicador` (todas sus versiones) de un código, con parámetro enlazado.
+        """
+        with _self.engine.connect() as conn:
+            keys = conn.execute(
+                text("""
+                    SELECT indicador_key
+                    FROM curado_sch.dim_indicador
+                    WHERE codigo_indicador = :codigo
+                """),
+                {"codigo": codigo_indicador},
+            ).scalars().all()
+
+        return [int(k) for k in keys]
+
+    @versioned_cache(get_app_cache, serie=_serie)
+    def load_resumen(_self, codigo_indicador: str) -> dict:
         """
-        Consulta el query solicitado y lo convierte en un DataFrame de polars.
+        Nombre, periodicidad y rango de fechas cargado de un indicador, desde la vista
+        `curado_sch.indicador_resumen` (una fila por indicador, mantenida por la carga de hechos).
+        """
+        with _self.engine.connect() as conn:
+            fila = conn.execute(
+                text("""
+                    SELECT
+                        nombre_indicador AS indicador,
+                        periodicidad,
+                        primera_fecha AS min_date,
+                        ultima_fecha AS max_date
+                    FROM curado_sch.indicador_resumen
+                    WHERE codigo_indicador = :codigo
+                """),
+                {"codigo": codigo_indicador},
+            ).mappings().first()
+
+        if fila is None:
+            get_logger.warning("No existe el indicador %s en indicador_resumen.", codigo_indicador)
+            return {}
+        return dict(fila)
+
+    def _query_indicador(
+        _self,
+        codigo_indicador: Optional[str],
+        indicador_key: Optional[int],
+        desde: Optional[date],
+        hasta: Optional[date],
+        antes_de: Optional[tuple[date, int]] = None,
+        limite: Optional[int] = None,
+    ) -> tuple[TextClause, dict]:
+        """
+        Arma la consulta de la serie sobre `curado_sch.mrt_indicadores_disp` y sus parámetros.
+        Todos los valores van como parámetros enlazados. Los filtros usan las columnas
+        `indicador_key` y `date_key` de la vista, que Postgres empuja hasta `fct_indicador`: el
+        índice `ix_fact_indicator_date` recorre solo el tramo pedido.
+        """
+        if indicador_key is not None:
+            keys = [int(indicador_key)]
+        elif codigo_indicador is not None:
+            keys = _self.indicador_keys(codigo_indicador)
+        else:
+            raise ValueError("Indique codigo_indicador o indicador_key")
+
+        if not keys:
+            get_logger.warning("No existe el indicador %s en dim_indicador.", codigo_indicador)
+
+        filtros = ["m.indicador_key IN :keys"]
+        params: dict = {"keys": keys}
+        if desde is not None:
+            filtros.append("m.date_key >= :desde_key")
+            params["desde_key"] = int(desde.strftime("%Y%m%d"))
+        if hasta is not None:
+            filtros.append("m.date_key <= :hasta_key")
+            params["hasta_key"] = int(hasta.strftime("%Y%m%d"))
+        if antes_de is not None:
+            fecha, key = antes_de
+            filtros.append("(m.date_key, m.indicador_key) < (:cursor_fecha, :cursor_key)")
+            params["cursor_fecha"] = int(fecha.strftime("%Y%m%d"))
+            params["cursor_key"] = int(key)
+
+        # Las páginas llevan la llave de la versión (SCD2) para desempatar el cursor
+        llave = ',\n                m.indicador_key AS "indicador_key"' if limite is not None else ""
+        tope = ""
+        if limite is not None:
+            tope = "LIMIT :limite"
+            params["limite"] = int(limite)
+
+        q = text(f"""
+            SELECT
+                m."Código de indicador",
+                m."Nombre de indicador",
+                m."Descripción de indicador",
+                m."Periodicidad",
+                m."Valor de Indicador",
+                m."Fecha de emisión"{llave}
+            FROM curado_sch.mrt_indicadores_disp m
+            WHERE {" AND ".join(filtros)}
+            ORDER BY m.date_key DESC, m.indicador_key DESC
+            {tope}
+        """).bindparams(bindparam("keys", expanding=True))
+        return q, params
+
+    @versioned_cache(get_app_cache, serie=_serie)
+    def load_indicador_data(
+        _self,
+        codigo_indicador: Optional[str] = None,
+        indicador_key: Optional[int] = None,
+        desde: Optional[date] = None,
+        hasta: Optional[date] = None,
+    ):
+        """
+        Consulta la serie de un indicador entre `desde` y `hasta` (inclusive) y la devuelve como
+        un DataFrame de polars con las columnas de `mrt_indicadores_disp`.
+
+        La consulta filtra la vista del mart por `indicador_key` y `date_key` con parámetros
+        enlazados, así la resuelve el índice `ix_fact_indicator_date` en milisegundos sin
+        importar el tamaño del mart.
 
         ...
         Atributos
         ----------
-        raw_value: str
-            Valor que da el `st.selectbox( )` en formato `str`.
+        codigo_indicador: str
+            Código del indicador en el BCCR.
+        indicador_key: int
+            Llave de `dim_indicador`; alternativa al código.
+        desde, hasta: date
+            Rango de fechas de emisión; sin ellos se trae la serie completa.
         """
+        q, params = _self._query_indicador(codigo_indicador, indicador_key, desde, hasta)
+        try:
+            get_logger.debug("Ejecutando query solicitado...")
+            data = pl.read_database(q, connection=_self.engine, execute_options={"parameters": params})
+            get_logger.debug("Query ejecutado correctamente.")
+        except Exception as err:
+            get_logger.error(f"Error inesperado: {err=} {type(err)=}")
+            raise
 
+        return data
 
-        # Al nombre lo cortamos la linea del centro para luego hacer la consulta del query
-        code, name = raw_value.split(" - ", 1)
-        name_safe = name.replace("'", "''")
+    def load_indicador_pagina(
+        _self,
+        codigo_indicador: str,
+        desde: Optional[date] = None,
+        hasta: Optional[date] = None,
+        antes_de: Optional[tuple[date, int]] = None,
+        filas: int = 100,
+    ) -> pl.DataFrame:
+        """
+        Una página de la serie, de la fecha más reciente a la más antigua, con paginación por
+        llave: la página siguiente empieza después de la última fila de la anterior, dada por
+        `antes_de = ("Fecha de emisión", indicador_key)`. La llave desempata las versiones de
+        `dim_indicador` que comparten fecha, así ninguna fila se salta entre páginas. Cada
+        página cuesta lo mismo sin importar qué tan atrás esté; incluye la columna `indicador_key`.
 
-        # Query.
-        q = f"""
-            SELECT *
-            FROM mart_sch.mrt_indicadores_disp
-            WHERE "Código de indicador" = '{code}'
-            AND "Nombre de indicador" = '{name_safe}'
-            ORDER BY "Fecha de emisión" DESC;
+        Las páginas no pasan por la caché: son consultas pequeñas sobre el índice y llenarían la
+        LRU desplazando las series completas.
+        """
+        q, params = _self._query_indicador(codigo_indicador, None, desde, hasta, antes_de=antes_de, limite=filas)
+        try:
+            get_logger.debug("Ejecutando query solicitado...")
+            data = pl.read_database(q, connection=_self.engine, execute_options={"parameters": params})
+            get_logger.debug("Query ejecutado correctamente.")
+        except Exception as err:
+            get_logger.error(f"Error inesperado: {err=} {type(err)=}")
+            raise
+
+        return data
+
+    @versioned_cache(get_app_cache, serie=_serie)
+    def load_vintage(_self, codigo_indicador: str, as_of: datetime | date) -> pl.DataFrame:
+        """
+        Devuelve la serie completa de un indicador tal como se conocía en `as_of`.
+
+        Para cada fecha toma la última revisión de `curado_sch.fct_indicador_revision` con
+        `valid_from <= as_of`; la consulta usa el índice `ix_revision_asof`.
+
+        ...
+        Atributos
+        ----------
+        codigo_indicador: str
+            Código del indicador en el BCCR.
+        as_of: datetime | date
+            Momento de la foto; una fecha se toma hasta el final de ese día.
         """
+        if not isinstance(as_of, datetime):
+            as_of = datetime.combine(as_of, time.max)
+
+        q = text("""
+            SELECT DISTINCT ON (r.date_key)
+                d.fecha AS "Fecha de emisión",
+                r.valorind AS "Valor de Indicador",
+                r.valid_from AS "Vigente desde"
+            FROM curado_sch.fct_indicador_revision r
+            JOIN curado_sch.dim_fecha d
+                ON r.date_key = d.date_key
+            WHERE r.indicador_key IN (
+                SELECT indicador_key
+                FROM curado_sch.dim_indicador
+                WHERE codigo_indicador = :codigo
+            )
+            AND r.valid_from <= :as_of
+            ORDER BY r.date_key, r.valid_from DESC;
+        """)
         try:
             get_logger.debug("Ejecutando query solicitado...")
             data = pl.read_database(
                 query=q,
-                connection=_self.alchemy_conn
+                connection=_self.engine,
+                execute_options={"parameters": {"codigo": codigo_indicador, "as_of": as_of}},
             )
             get_logger.debug("Query ejecutado correctamente.")
         except Exception as err:
@@ -105,8 +424,8 @@ class database_conn:
             raise
 
         return data
-    
-    @st.cache_data
+
+    @versioned_cache(get_app_cache)
     def load_lista_salarios(_self):
 
         q = """
@@ -117,7 +436,7 @@ class database_conn:
             get_logger.debug("Ejecutando query solicitado...")
             data=pl.read_database(
                 query=q,
-                connection=_self.alchemy_conn)
+                connection=_self.engine)
             get_logger.debug("Query ejecutado correctamente.")
         except Exception as err:
             get_logger.error(f"Error inesperado: {err=} {type(err)=}")
@@ -126,21 +445,26 @@ class database_conn:
         
         return data
 
+    def cache_stats(_self) -> dict:
+        """
+        Aciertos, fallos e invalidaciones de la caché de los loaders.
+        """
+        return get_app_cache().stats()
+
 class PostgreSQLconn:
     """
-    Docstring for PostgreSQLconn
+    Acceso al pool de conexiones compartido de PostgreSQL (ver `get_engine()`).
     """
     def __init__(self):        
-        load_dotenv()
-
-        self.url = os.getenv("SQL_URL")
+        self.engine = get_engine()
         
     def create_conn(self):
-        engine = create_engine(
-            url=self.url
-        )
-        alchemy_conn = engine.connect()
-        get_logger.debug("Credenciales cargados con éxito.")
+        """
+        Toma una conexión del pool compartido. Quien la pide debe cerrarla
+        (o usarla con `with`) para devolverla al pool.
+        """
+        alchemy_conn = self.engine.connect()
+        get_logger.debug("Conexión tomada del pool compartido.")
 
         return alchemy_conn
 
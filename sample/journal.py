@@ -0,0 +1,195 @@
+# -------------------------------------------------------------------------------------
+#  Autor: Marco Espinoza — Consultor
+# Laboratorio de Prospectiva, Innovación e Inteligencia Artificial
+# Fecha: 18-10-2026
+# Descripción del archivo: bitácora persistente de las corridas del orquestador para reanudarlas
+# -------------------------------------------------------------------------------------
+
+import uuid
+from typing import Callable, Optional
+
+import polars as pl
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from sample.helpers import get_engine
+from sample.utils import logger
+
+get_logger = logger("Journal", "journal.log")
+
+ESTADOS = ("planned", "fetched", "written", "failed")
+
+
+class RunJournal:
+    """
+    Bitácora de una corrida del orquestador en `bccr_sch.run_journal`, por `ingestion_run_id`.
+
+    Cada unidad (indicador con su ventana de fechas) pasa por `planned`, `fetched` y `written`,
+    o termina en `failed` con el motivo. Si el proceso muere, `RunJournal.resume()` devuelve
+    la misma corrida y `pendientes()` solo las unidades que no quedaron escritas.
+
+    ...
+
+    Atributos
+    ----------
+    run_id : str
+        `ingestion_run_id` de la corrida; por defecto uno nuevo.
+    engine : Engine
+        Engine de SQLAlchemy; por defecto el pool compartido de `get_engine()`.
+
+    Métodos
+    ----------
+    journal = RunJournal()
+        Crea la tabla si no existe.
+    journal.plan(data)
+        Registra las unidades de `TidyJob()`.
+    journal.mark(indicador, "fetched")
+        Cambia el estado de una unidad.
+    journal.on_written(indicador, filas)
+        Callback para `CrudoBulkWriter.add(..., on_flush=...)`.
+    journal.pendientes()
+        Unidades que falta escribir.
+    """
+
+    def __init__(self, run_id: Optional[str] = None, engine: Optional[Engine] = None) -> None:
+        self.run_id = run_id or str(uuid.uuid4())
+        self.engine = engine or get_engine()
+
+        with open("./orquestador/sql/run_journal.sql", "r") as f:
+            ddl = f.read()
+        with self.engine.begin() as conn:
+            conn.execute(text(ddl))
+
+    @classmethod
+    def resume(cls, run_id: Optional[str] = None, engine: Optional[Engine] = None) -> "RunJournal":
+        """
+        Retoma `run_id` o, si no se indica, la corrida más reciente con unidades pendientes.
+        """
+        journal = cls(run_id=run_id, engine=engine)
+        if run_id is not None:
+            return journal
+
+        with journal.engine.connect() as conn:
+            ultimo = conn.execute(text(
+                """
+                select ingestion_run_id::text
+                from bccr_sch.run_journal
+                where estado <> 'written'
+                group by ingestion_run_id
+                order by max(creado_en) desc
+                limit 1
+                """
+            )).scalar()
+
+        if ultimo is None:
+            raise LookupError("No hay corridas con unidades pendientes para reanudar")
+
+        journal.run_id = ultimo
+        get_logger.info("Reanudando la corrida %s", ultimo)
+        return journal
+
+    def plan(self, data: pl.DataFrame) -> None:
+        """
+        Registra como `planned` las unidades de `data` (salida de `TidyJob()`).
+        """
+        if data.is_empty():
+            return
+
+        filas = [
+            {
+                "run_id": self.run_id,
+                "codigo": row["codigo_indicador"],
+                "periodicidad": row.get("periodicidad"),
+                "inicio": row["fecha_inicio"],
+                "final": row["fecha_final"],
+            }
+            for row in data.iter_rows(named=True)
+        ]
+        with self.engine.begin() as conn:
+            conn.execute(text(
+                """
+                insert into bccr_sch.run_journal
+                    (ingestion_run_id, codigo_indicador, periodicidad, fecha_inicio, fecha_final)
+                values (cast(:run_id as uuid), :codigo, :periodicidad, :inicio, :final)
+                on conflict do nothing
+                """
+            ), filas)
+
+        get_logger.info("Corrida %s: %d unidades planificadas", self.run_id, len(filas))
+
+    def mark(self, indicador: str, estado: str, error: Optional[BaseException | str] = None) -> None:
+        """
+        Cambia el estado de una unidad; `error` guarda el motivo de una falla.
+        """
+        if estado not in ESTADOS:
+            raise ValueError(f"Estado desconocido: {estado}")
+
+        with self.engine.begin() as conn:
+            conn.execute(text(
+                """
+                update bccr_sch.run_journal
+                set estado = :estado,
+                    error = :error,
+                    actualizado_en = now()
+                where ingestion_run_id = cast(:run_id as uuid)
+                  and codigo_indicador = :codigo
+                """
+            ), {
+                "estado": estado,
+                "error": None if error is None else str(error)[:2000],
+                "run_id": self.run_id,
+                "codigo": indicador,
+            })
+
+    def on_written(self, indicador: str, filas: int) -> Callable:
+        """
+        Devuelve un callback `on_flush(cursor)` que marca la unidad como `written` dentro de la
+        transacción del COPY que carga sus filas.
+        """
+        def _callback(cur) -> None:
+            cur.execute(
+                """
+                update bccr_sch.run_journal
+                set estado = 'written',
+                    filas = %s,
+                    error = null,
+                    actualizado_en = now()
+                where ingestion_run_id = %s
+                  and codigo_indicador = %s
+                """,
+                (filas, self.run_id, indicador),
+            )
+        return _callback
+
+    def pendientes(self) -> pl.DataFrame:
+        """
+        Unidades de la corrida que no quedaron escritas, con las columnas de `TidyJob()`.
+        """
+        return pl.read_database(
+            query=text(
+                """
+                select codigo_indicador, periodicidad, fecha_inicio, fecha_final
+                from bccr_sch.run_journal
+                where ingestion_run_id = cast(:run_id as uuid)
+                  and estado <> 'written'
+                order by codigo_indicador
+                """
+            ),
+            connection=self.engine,
+            execute_options={"parameters": {"run_id": self.run_id}},
+        )
+
+    def resumen(self) -> dict:
+        """
+        Cantidad de unidades por estado.
+        """
+        with self.engine.connect() as conn:
+            filas = conn.execute(text(
+                """
+                select estado, count(*)
+                from bccr_sch.run_journal
+                where ingestion_run_id = cast(:run_id as uuid)
+                group by estado
+                """
+            ), {"run_id": self.run_id}).all()
+        return {estado: n for estado, n in filas}
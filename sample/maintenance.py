@@ -0,0 +1,210 @@
+# -------------------------------------------------------------------------------------
+#  Autor: Marco Espinoza — Consultor
+# Laboratorio de Prospectiva, Innovación e Inteligencia Artificial
+# Fecha: 18-10-2026
+# Descripción del archivo: particiones, compactación y retención de bccr_sch.indicador_crudo
+# -------------------------------------------------------------------------------------
+
+import argparse
+from datetime import date
+from pathlib import Path
+from typing import List, Optional
+
+import polars as pl
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from sample.helpers import get_engine
+from sample.utils import logger
+
+get_logger = logger("Maintenance", "maintenance.log")
+
+PREFIJO = "indicador_crudo_p"
+
+
+def _mes(d: date, delta: int = 0) -> date:
+    """Primer día del mes de `d` desplazado `delta` meses."""
+    total = d.year * 12 + d.month - 1 + delta
+    return date(total // 12, total % 12 + 1, 1)
+
+
+class CrudoMaintenance:
+    """
+    Mantenimiento de `bccr_sch.indicador_crudo` particionada por mes de `extraccion_en`
+    (ver `sql/particion_crudo.sql`).
+
+    ...
+
+    Atributos
+    ----------
+    engine : Engine
+        Engine de SQLAlchemy; por defecto el pool compartido de `get_engine()`.
+
+    Métodos
+    ----------
+    mant = CrudoMaintenance()
+    mant.ensure_partitions(2)
+        Crea las particiones del mes actual y los dos siguientes.
+    mant.compact(date(2026, 1, 1))
+        Borra las descargas repetidas extraídas antes de la fecha.
+    mant.archive(date(2025, 1, 1), "./archivo")
+        Exporta a Parquet y elimina las particiones anteriores a la fecha.
+    """
+
+    def __init__(self, engine: Optional[Engine] = None) -> None:
+        self.engine = engine or get_engine()
+
+    def partitions(self) -> List[str]:
+        """
+        Particiones mensuales existentes, de la más antigua a la más reciente.
+        """
+        with self.engine.connect() as conn:
+            nombres = conn.execute(text(
+                """
+                select c.relname
+                from pg_inherits i
+                join pg_class c on c.oid = i.inhrelid
+                where i.inhparent = 'bccr_sch.indicador_crudo'::regclass
+                  and c.relname like :prefijo
+                order by c.relname
+                """
+            ), {"prefijo": f"{PREFIJO}%"}).scalars().all()
+        return list(nombres)
+
+    def ensure_partitions(self, meses_adelante: int = 2) -> None:
+        """
+        Crea las particiones del mes actual y de los `meses_adelante` siguientes si no existen.
+
+        Si la partición default recibió filas de ese mes (las particiones no estaban al día),
+        Postgres no deja crear la partición nueva: en ese caso se separa la default, se crea
+        la partición, se le mueven esas filas y se vuelve a adjuntar la default, todo en una
+        misma transacción.
+        """
+        hoy = date.today()
+        existentes = set(self.partitions())
+
+        for delta in range(meses_adelante + 1):
+            inicio, fin = _mes(hoy, delta), _mes(hoy, delta + 1)
+            nombre = f"{PREFIJO}{inicio:%Y%m}"
+            if nombre in existentes:
+                continue
+
+            crear = text(
+                f"create table bccr_sch.{nombre} "
+                f"partition of bccr_sch.indicador_crudo "
+                f"for values from ('{inicio.isoformat()}') to ('{fin.isoformat()}')"
+            )
+            rango = {"inicio": inicio, "fin": fin}
+
+            with self.engine.begin() as conn:
+                en_default = conn.execute(text(
+                    """
+                    select count(*)
+                    from bccr_sch.indicador_crudo_default
+                    where extraccion_en >= :inicio and extraccion_en < :fin
+                    """
+                ), rango).scalar()
+
+                if not en_default:
+                    conn.execute(crear)
+                    continue
+
+                conn.execute(text("alter table bccr_sch.indicador_crudo detach partition bccr_sch.indicador_crudo_default"))
+                conn.execute(crear)
+                conn.execute(text(
+                    f"""
+                    with movidas as (
+                        delete from bccr_sch.indicador_crudo_default
+                        where extraccion_en >= :inicio and extraccion_en < :fin
+                        returning *
+                    )
+                    insert into bccr_sch.{nombre}
+                    select * from movidas
+                    """
+                ), rango)
+                conn.execute(text("alter table bccr_sch.indicador_crudo attach partition bccr_sch.indicador_crudo_default default"))
+
+            get_logger.warning("Partición %s creada con %d filas movidas desde la default", nombre, en_default)
+
+        get_logger.info("Particiones de indicador_crudo al día hasta %s", _mes(hoy, meses_adelante + 1))
+
+    def compact(self, antes_de: date) -> int:
+        """
+        Borra, mes a mes, las descargas extraídas antes de `antes_de` que repiten el valor de la
+        versión anterior y no son la última. Devuelve la cantidad de filas borradas.
+        """
+        with open("./sql/compactar_crudo.sql", "r") as f:
+            query = text(f.read())
+
+        borradas = 0
+        for nombre in self.partitions():
+            inicio = date(int(nombre[-6:-2]), int(nombre[-2:]), 1)
+            fin = min(_mes(inicio, 1), antes_de)
+            if inicio >= antes_de:
+                break
+
+            with self.engine.begin() as conn:
+                n = conn.execute(query, {"desde": inicio, "hasta": fin}).rowcount
+            borradas += max(n, 0)
+            get_logger.info("Compactación %s: %d filas repetidas borradas", nombre, n)
+
+        return borradas
+
+    def archive(self, antes_de: date, destino: str | Path, borrar: bool = True) -> List[Path]:
+        """
+        Exporta a Parquet (zstd) las particiones cuyo mes terminó antes de `antes_de` y, si
+        `borrar`, las separa de la tabla y las elimina. Devuelve los archivos escritos.
+
+        Los puntos archivados siguen en `curado_sch.fct_indicador`; `ChangeDetector` usa ese
+        valor cuando ya no queda ninguna versión cruda, así una recarga no los reinserta.
+        """
+        destino = Path(destino)
+        destino.mkdir(parents=True, exist_ok=True)
+        archivos: List[Path] = []
+
+        for nombre in self.partitions():
+            inicio = date(int(nombre[-6:-2]), int(nombre[-2:]), 1)
+            if _mes(inicio, 1) > antes_de:
+                break
+
+            df = pl.read_database(
+                query=f"select * from bccr_sch.{nombre} order by crudo_id",
+                connection=self.engine,
+            )
+            archivo = destino / f"{nombre}.parquet"
+            df.write_parquet(archivo, compression="zstd")
+
+            # Solo se elimina la partición si el archivo se puede leer completo
+            if pl.scan_parquet(archivo).select(pl.len()).collect().item() != df.height:
+                raise RuntimeError(f"El archivo {archivo} no coincide con la partición {nombre}")
+            archivos.append(archivo)
+
+            if borrar:
+                with self.engine.begin() as conn:
+                    conn.execute(text(f"alter table bccr_sch.indicador_crudo detach partition bccr_sch.{nombre}"))
+                    conn.execute(text(f"drop table bccr_sch.{nombre}"))
+
+            get_logger.info("Partición %s archivada en %s (%d filas)", nombre, archivo, df.height)
+
+        return archivos
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mantenimiento de bccr_sch.indicador_crudo")
+    parser.add_argument("accion", choices=["particiones", "compactar", "archivar"])
+    parser.add_argument("--meses", type=int, default=2, help="Meses adelante a particionar")
+    parser.add_argument("--antes", type=date.fromisoformat,
+                        help="Fecha de corte de extracción para compactar o archivar (AAAA-MM-DD)")
+    parser.add_argument("--destino", default="./archivo", help="Carpeta de los archivos Parquet")
+    parser.add_argument("--conservar", action="store_true", help="Archiva sin borrar las particiones")
+    args = parser.parse_args()
+
+    mant = CrudoMaintenance()
+    if args.accion == "particiones":
+        mant.ensure_partitions(args.meses)
+    elif args.antes is None:
+        parser.error("--antes es obligatorio para compactar y archivar")
+    elif args.accion == "compactar":
+        mant.compact(args.antes)
+    else:
+        mant.archive(args.antes, args.destino, borrar=not args.conservar)
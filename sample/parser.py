@@ -0,0 +1,153 @@
+# -------------------------------------------------------------------------------------
+#  Autor: Marco Espinoza — Consultor
+# Laboratorio de Prospectiva, Innovación e Inteligencia Artificial
+# Fecha: 18-10-2026
+# Descripción del archivo: lectura incremental de las series JSON del BCCR a columnas tipadas
+# -------------------------------------------------------------------------------------
+
+import json
+from array import array
+from datetime import date
+from typing import Any, BinaryIO, Dict, Iterator, Optional, Tuple
+
+import numpy as np
+import polars as pl
+
+from sample.utils import logger
+
+try:
+    import ijson
+except ImportError:  # sin ijson se usa json de la librería estándar (sin streaming)
+    ijson = None
+
+get_logger = logger("Parser", "parser.log")
+
+_EPOCH = date(1970, 1, 1).toordinal()
+# Centinela para fechas que no se pudieron interpretar (equivale a strict=False)
+_FECHA_NULA = -(2 ** 31)
+
+
+class SeriesBuilder:
+    """
+    Acumula la serie en buffers tipados (int32 con días desde 1970 y float64), sin crear
+    un diccionario de Python por punto. `finish()` entrega un DataFrame de Polars sin copias.
+    """
+
+    def __init__(self) -> None:
+        self.fechas = array("i")
+        self.valores = array("d")
+
+    def append(self, fecha: Optional[str], valor: Any) -> None:
+        try:
+            self.fechas.append(date.fromisoformat(str(fecha)[:10]).toordinal() - _EPOCH)
+        except (TypeError, ValueError):
+            self.fechas.append(_FECHA_NULA)
+        try:
+            self.valores.append(float(valor))
+        except (TypeError, ValueError):
+            self.valores.append(float("nan"))
+
+    def finish(self) -> pl.DataFrame:
+        fechas = pl.Series("fecha", np.frombuffer(self.fechas, dtype=np.int32))
+        valores = pl.Series("valorDatoPorPeriodo", np.frombuffer(self.valores, dtype=np.float64))
+        return pl.DataFrame([fechas, valores]).with_columns(
+            pl.when(pl.col("fecha") == _FECHA_NULA).then(None).otherwise(pl.col("fecha")).cast(pl.Date).alias("fecha"),
+            pl.col("valorDatoPorPeriodo").fill_nan(None),
+        )
+
+
+def _events(source: BinaryIO) -> Iterator[Tuple[str, str, Any]]:
+    """
+    Eventos (prefix, event, value) al estilo de `ijson.parse`. Sin ijson se recorre el
+    documento completo ya cargado, conservando la misma interfaz.
+    """
+    if ijson is not None:
+        try:
+            yield from ijson.parse(source, use_float=True)
+        except ijson.JSONError as e:
+            raise ValueError(str(e)) from e
+        return
+
+    def walk(prefix: str, obj: Any) -> Iterator[Tuple[str, str, Any]]:
+        if isinstance(obj, dict):
+            yield prefix, "start_map", None
+            for k, v in obj.items():
+                yield prefix, "map_key", k
+                yield from walk(f"{prefix}.{k}" if prefix else k, v)
+            yield prefix, "end_map", None
+        elif isinstance(obj, list):
+            yield prefix, "start_array", None
+            for v in obj:
+                yield from walk(f"{prefix}.item" if prefix else "item", v)
+            yield prefix, "end_array", None
+        else:
+            yield prefix, "null" if obj is None else type(obj).__name__, obj
+
+    yield from walk("", json.load(source))
+
+
+def parse_series(source: BinaryIO, debug_payload: bool = False) -> Tuple[Dict[str, Any], pl.DataFrame]:
+    """
+    Recorre `datos[0].series` de una respuesta del BCCR de forma incremental.
+
+    ...
+    Atributos
+    ----------
+    source: BinaryIO
+        Cuerpo de la respuesta (por ejemplo `BytesIO(response.content)` o `response.raw`).
+    debug_payload: bool
+        Si es True registra cada punto en el log DEBUG (costoso para series largas).
+
+    Devuelve `(meta, df)` donde `meta` contiene `codigoIndicador`, `nombreIndicador`,
+    `mensaje` y `n_datos` (cantidad de elementos en `datos`), y `df` tiene las columnas
+    `fecha` (Date) y `valorDatoPorPeriodo` (Float64).
+    """
+    meta: Dict[str, Any] = {"codigoIndicador": None, "nombreIndicador": None, "mensaje": None, "n_datos": 0}
+    builder = SeriesBuilder()
+
+    raiz = None
+    tiene_datos = False
+    fecha, valor = None, None
+
+    for prefix, event, value in _events(source):
+
+        # Validaciones defensivas del contrato
+        if raiz is None:
+            raiz = event
+            if event != "start_map":
+                raise TypeError(f"Respuesta inesperada (no es dict): {event}")
+            continue
+
+        if prefix == "" and event == "map_key" and value == "datos":
+            tiene_datos = True
+        elif prefix == "datos" and event not in ("start_array", "end_array", "start_map", "end_map", "map_key"):
+            raise TypeError(f"'datos' no es una lista: {event}")
+        elif prefix == "datos" and event == "start_map":
+            raise TypeError("'datos' no es una lista: dict")
+        elif prefix == "mensaje":
+            meta["mensaje"] = value
+        elif prefix == "datos.item" and event == "start_map":
+            meta["n_datos"] += 1
+
+        # Solo interesa el primer indicador de la respuesta
+        if meta["n_datos"] != 1:
+            continue
+
+        if prefix == "datos.item.codigoIndicador":
+            meta["codigoIndicador"] = value
+        elif prefix == "datos.item.nombreIndicador":
+            meta["nombreIndicador"] = value
+        elif prefix == "datos.item.series.item.fecha":
+            fecha = value
+        elif prefix == "datos.item.series.item.valorDatoPorPeriodo":
+            valor = value
+        elif prefix == "datos.item.series.item" and event == "end_map":
+            if debug_payload:
+                get_logger.debug("Punto recibido: fecha=%s valor=%s", fecha, valor)
+            builder.append(fecha, valor)
+            fecha, valor = None, None
+
+    if not tiene_datos:
+        raise KeyError("La respuesta JSON no contiene la clave 'datos'")
+
+    return meta, builder.finish()
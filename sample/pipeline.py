@@ -0,0 +1,331 @@
+# -------------------------------------------------------------------------------------
+#  Autor: Marco Espinoza — Consultor
+# Laboratorio de Prospectiva, Innovación e Inteligencia Artificial
+# Fecha: 18-10-2026
+# Descripción del archivo: pipeline por etapas (descarga → normalización → validación → escritura)
+# -------------------------------------------------------------------------------------
+
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Iterable, Iterator, List, Optional
+
+import polars as pl
+
+from sample.concurrency import AdaptiveConcurrency
+from sample.core import BccrAPI, BccrRateLimitError
+from sample.retry import RunBudget
+from sample.utils import logger
+from sample.writer import CrudoBulkWriter, normalize_crudo
+
+get_logger = logger("Pipeline", "pipeline.log")
+
+# Marca de fin de flujo entre etapas
+_FIN = object()
+
+
+class Stage:
+    """
+    Etapa del pipeline: aplica `fn(unidad) -> unidad` con `hilos` hilos en paralelo.
+
+    Una unidad es un dict con `row` (fila de `TidyJob()`), `df` y `error`. Si una etapa falla,
+    la unidad sigue con `error` y las etapas siguientes la dejan pasar sin procesarla.
+
+    ...
+
+    Atributos
+    ----------
+    nombre : str
+        Nombre para los reportes de rendimiento.
+    fn : Callable
+        Trabajo de la etapa.
+    hilos : int
+        Hilos de la etapa.
+    """
+
+    def __init__(self, nombre: str, fn: Callable[[dict], dict], hilos: int = 1) -> None:
+        self.nombre = nombre
+        self.fn = fn
+        self.hilos = hilos
+
+        self.items = 0
+        self.filas = 0
+        self.errores = 0
+        self.ocupado = 0.0
+        self._lock = threading.Lock()
+
+    def _registrar(self, unidad: dict, segundos: float) -> None:
+        with self._lock:
+            self.items += 1
+            self.ocupado += segundos
+            if unidad.get("error") is not None:
+                self.errores += 1
+            elif unidad.get("df") is not None:
+                self.filas += unidad["df"].height
+
+    def reporte(self, transcurrido: float) -> str:
+        with self._lock:
+            por_segundo = self.filas / transcurrido if transcurrido > 0 else 0.0
+            uso = self.ocupado / (transcurrido * self.hilos) if transcurrido > 0 else 0.0
+            return (
+                f"{self.nombre}: {self.items} unidades, {self.filas} filas "
+                f"({por_segundo:,.0f} filas/s, {uso:.0%} ocupada, {self.errores} errores)"
+            )
+
+
+class Pipeline:
+    """
+    Conecta etapas con colas acotadas para que la red y la base de datos trabajen a la vez.
+
+    Cada cola admite `maxsize` unidades: si una etapa se atrasa, las anteriores se bloquean
+    (backpressure) y la memoria se mantiene plana sin importar cuántos indicadores haya.
+
+    ...
+
+    Atributos
+    ----------
+    stages : list[Stage]
+        Etapas en orden.
+    maxsize : int
+        Capacidad de cada cola entre etapas.
+    reporte_cada : float
+        Segundos entre reportes de rendimiento en el log.
+
+    Métodos
+    ----------
+    for unidad in Pipeline([...]).run(filas):
+        ...
+    """
+
+    def __init__(self, stages: List[Stage], maxsize: int = 16, reporte_cada: float = 30.0) -> None:
+        self.stages = stages
+        self.maxsize = maxsize
+        self.reporte_cada = reporte_cada
+        self._inicio = time.monotonic()
+
+    @staticmethod
+    def _put(cola: queue.Queue, item, cancelado: threading.Event) -> bool:
+        """Encola esperando turno; devuelve False si la corrida se canceló mientras esperaba."""
+        while not cancelado.is_set():
+            try:
+                cola.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    @staticmethod
+    def _get(cola: queue.Queue, cancelado: threading.Event):
+        """Toma el siguiente elemento; devuelve `_FIN` si la corrida se canceló."""
+        while not cancelado.is_set():
+            try:
+                return cola.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _FIN
+
+    def _worker(self, stage: Stage, entrada: queue.Queue, salida: queue.Queue, vivos: list, lock: threading.Lock, siguientes: int, cancelado: threading.Event) -> None:
+        while True:
+            unidad = self._get(entrada, cancelado)
+            if unidad is _FIN:
+                break
+
+            t0 = time.monotonic()
+            if unidad.get("error") is None:
+                try:
+                    unidad = stage.fn(unidad)
+                except Exception as e:
+                    unidad["error"] = e
+            stage._registrar(unidad, time.monotonic() - t0)
+            if not self._put(salida, unidad, cancelado):
+                return
+
+        # El último hilo de la etapa cierra la cola de salida, una marca por hilo siguiente
+        with lock:
+            vivos[0] -= 1
+            ultimo = vivos[0] == 0
+        if ultimo:
+            for _ in range(siguientes):
+                self._put(salida, _FIN, cancelado)
+
+    def run(self, items: Iterable[dict]) -> Iterator[dict]:
+        """
+        Pasa cada fila de `items` por todas las etapas y devuelve las unidades terminadas
+        conforme salen de la última.
+
+        Si quien consume deja de iterar antes del final (break, excepción, presupuesto agotado),
+        la corrida se cancela: los hilos dejan de tomar trabajo, las colas se vacían para
+        liberar a los que esperan turno y se espera a que todos terminen.
+        """
+        self._inicio = time.monotonic()
+        colas = [queue.Queue(maxsize=self.maxsize) for _ in range(len(self.stages) + 1)]
+        cancelado = threading.Event()
+        hilos: List[threading.Thread] = []
+
+        for i, stage in enumerate(self.stages):
+            siguientes = self.stages[i + 1].hilos if i + 1 < len(self.stages) else 1
+            vivos, lock = [stage.hilos], threading.Lock()
+            for n in range(stage.hilos):
+                hilo = threading.Thread(
+                    target=self._worker,
+                    args=(stage, colas[i], colas[i + 1], vivos, lock, siguientes, cancelado),
+                    name=f"{stage.nombre}-{n}",
+                    daemon=True,
+                )
+                hilo.start()
+                hilos.append(hilo)
+
+        def _alimentar() -> None:
+            for row in items:
+                if not self._put(colas[0], {"row": row, "df": None, "error": None}, cancelado):
+                    return
+            for _ in range(self.stages[0].hilos):
+                self._put(colas[0], _FIN, cancelado)
+
+        alimentador = threading.Thread(target=_alimentar, name="pipeline-feed", daemon=True)
+        alimentador.start()
+        hilos.append(alimentador)
+
+        completo = False
+        try:
+            ultimo_reporte = time.monotonic()
+            while True:
+                unidad = colas[-1].get()
+                if unidad is _FIN:
+                    completo = True
+                    break
+                yield unidad
+
+                if time.monotonic() - ultimo_reporte >= self.reporte_cada:
+                    self.log_stats()
+                    ultimo_reporte = time.monotonic()
+        finally:
+            if not completo:
+                get_logger.warning("Pipeline cancelado antes de terminar; cerrando etapas.")
+                cancelado.set()
+            for hilo in hilos:
+                while hilo.is_alive():
+                    for cola in colas:
+                        while True:
+                            try:
+                                cola.get_nowait()
+                            except queue.Empty:
+                                break
+                    hilo.join(timeout=0.1)
+            self.log_stats()
+
+    def log_stats(self) -> None:
+        transcurrido = time.monotonic() - self._inicio
+        for stage in self.stages:
+            get_logger.info("Pipeline %s", stage.reporte(transcurrido))
+
+
+def ingest_pipeline(
+        writer: CrudoBulkWriter,
+        run_id: str,
+        api_name: str = "BCCR-INDICADORES",
+        max_workers: int = 8,
+        limiter: Optional[AdaptiveConcurrency] = None,
+        budget: Optional[RunBudget] = None,
+        on_fetched: Optional[Callable[[str], None]] = None,
+        on_flush_for: Optional[Callable[[str, int], Callable]] = None,
+        on_error_for: Optional[Callable[[str], Callable]] = None,
+        maxsize: int = 16,
+    ) -> Pipeline:
+    """
+    Pipeline de ingesta de indicadores a `bccr_sch.indicador_crudo`.
+
+    - descarga: `BccrAPI.read_as_dataframe()` en `max_workers` hilos con concurrencia adaptativa.
+    - normalización: columnas de la corrida y tipos de `CRUDO_COLUMNS`.
+    - validación: descarta fechas nulas, valores no finitos y fechas repetidas; rechaza series
+      cuyo código no coincide con el solicitado.
+    - escritura: agrega al lote de `writer`, que descarta los puntos sin cambios (ver
+      `CrudoBulkWriter`) y carga con COPY; dos hilos, para que la detección de cambios de una
+      unidad no espere a la de otra.
+
+    `on_fetched(codigo)` se llama al terminar cada descarga y `on_flush_for(codigo, filas)`
+    devuelve el callback que se ejecuta en la transacción del COPY de esas filas.
+    `on_error_for(codigo)` devuelve el callback `on_error(error)` que recibe la unidad si ese
+    COPY falla; la unidad ya salió del pipeline sin error, así que esa es la única señal.
+    """
+    limiter = limiter or AdaptiveConcurrency(inicial=min(4, max_workers), maximo=max_workers)
+    BccrAPI.configure_pool(max(limiter.maximo, BccrAPI.POOL_SIZE))
+
+    def _descargar(unidad: dict) -> dict:
+        row = unidad["row"]
+        with limiter:
+            try:
+                df = BccrAPI(
+                    api_name=api_name,
+                    indicador=row["codigo_indicador"],
+                    fecha_inicio=row["fecha_inicio"],
+                    fecha_final=row["fecha_final"],
+                    limiter=limiter,
+                    periodicidad=row.get("periodicidad"),
+                    budget=budget,
+                    ingestion_run_id=run_id,
+                ).read_as_dataframe()
+            except BccrRateLimitError:
+                limiter.on_rate_limited()
+                raise
+            limiter.on_success()
+
+        if on_fetched is not None:
+            on_fetched(row["codigo_indicador"])
+        unidad["df"] = df
+        return unidad
+
+    def _normalizar(unidad: dict) -> dict:
+        df, codigo = unidad["df"], unidad["row"]["codigo_indicador"]
+        if df.is_empty():
+            return unidad
+
+        unidad["df"] = normalize_crudo(
+            df.with_columns(
+                pl.col("codigo_indicador").fill_null(codigo),
+                pl.lit("api_bccr").alias("fuente_datos"),
+                pl.lit(run_id).alias("ingestion_run_id"),
+                pl.lit(datetime.now()).alias("extraccion_en"),
+            )
+        )
+        return unidad
+
+    def _validar(unidad: dict) -> dict:
+        df, codigo = unidad["df"], unidad["row"]["codigo_indicador"]
+        if df.is_empty():
+            return unidad
+
+        recibido = df["codigo_indicador"][0]
+        if recibido is not None and str(recibido) != str(codigo):
+            raise ValueError(f"La API devolvió el indicador {recibido} al pedir {codigo}")
+
+        limpio = (
+            df.filter(
+                pl.col("fecha").is_not_null()
+                & (pl.col("valorDatoPorPeriodo").is_null() | pl.col("valorDatoPorPeriodo").is_finite())
+            )
+            .unique(subset=["fecha"], keep="last", maintain_order=True)
+        )
+        if limpio.height < df.height:
+            get_logger.warning("%s: %d filas descartadas en la validación", codigo, df.height - limpio.height)
+
+        unidad["df"] = limpio
+        return unidad
+
+    def _escribir(unidad: dict) -> dict:
+        df, codigo = unidad["df"], unidad["row"]["codigo_indicador"]
+        on_flush = on_flush_for(codigo, df.height) if on_flush_for is not None else None
+        on_error = on_error_for(codigo) if on_error_for is not None else None
+        writer.add(df if df.height > 0 else pl.DataFrame(), on_flush=on_flush, on_error=on_error)
+        return unidad
+
+    return Pipeline(
+        [
+            Stage("descarga", _descargar, hilos=limiter.maximo),
+            Stage("normalización", _normalizar),
+            Stage("validación", _validar),
+            Stage("escritura", _escribir, hilos=2),
+        ],
+        maxsize=maxsize,
+    )
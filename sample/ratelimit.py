@@ -0,0 +1,176 @@
+# -------------------------------------------------------------------------------------
+#  Autor: Marco Espinoza — Consultor
+# Laboratorio de Prospectiva, Innovación e Inteligencia Artificial
+# Fecha: 18-10-2026
+# Descripción del archivo: limitador de solicitudes compartido entre procesos para el token del BCCR
+# -------------------------------------------------------------------------------------
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+from sample.retry import RunBudget
+from sample.utils import logger
+
+try:
+    import fcntl
+
+    def _lock(f) -> None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+
+    def _unlock(f) -> None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+except ImportError:  # Windows
+    import msvcrt
+
+    def _lock(f) -> None:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+
+    def _unlock(f) -> None:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+get_logger = logger("RateLimit", "ratelimit.log")
+
+
+class SharedTokenBucket:
+    """
+    Token bucket cuyo estado vive en un archivo local protegido con un file lock, de modo que
+    todos los procesos que usan el mismo token del `conf.ini` (por ejemplo los orquestadores
+    diario y mensual corriendo a la vez) comparten la misma cuota.
+
+    Cuando un proceso recibe un 429, `penalize()` bloquea el bucket durante el `Retry-After`
+    y reduce la tasa a la mitad para todos. Las respuestas exitosas la recuperan poco a poco
+    con `reward()` hasta la tasa configurada.
+
+    ...
+
+    Atributos
+    ----------
+    token : str
+        Token de la API; solo se usa su hash para nombrar el archivo de estado.
+    rate : float
+        Solicitudes por segundo permitidas como máximo.
+    burst : float
+        Capacidad del bucket (ráfaga máxima).
+    min_rate : float
+        Tasa mínima a la que puede bajar tras varios 429.
+    state_dir : Path
+        Carpeta del archivo de estado; por defecto la carpeta temporal del sistema.
+    """
+
+    _INSTANCES: Dict[str, "SharedTokenBucket"] = {}
+    _INSTANCES_LOCK = threading.Lock()
+
+    def __init__(
+            self,
+            token: str,
+            rate: float = 1.0,
+            burst: float = 4.0,
+            min_rate: float = 0.05,
+            state_dir: Optional[os.PathLike[str] | str] = None,
+        ) -> None:
+
+        self.max_rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+
+        digest = hashlib.sha256(token.encode("utf-8")).hexdigest()[:16]
+        state_dir = Path(state_dir) if state_dir else Path(tempfile.gettempdir())
+        self.path = state_dir / f"bccr_bucket_{digest}.json"
+        self.path.touch(exist_ok=True)
+
+        # El file lock es por proceso; este lock serializa a los hilos del mismo proceso
+        self._thread_lock = threading.Lock()
+
+    @classmethod
+    def for_token(cls, token: str, **kwargs) -> "SharedTokenBucket":
+        """
+        Devuelve la instancia del proceso para `token`, creándola la primera vez.
+        """
+        with cls._INSTANCES_LOCK:
+            if token not in cls._INSTANCES:
+                cls._INSTANCES[token] = cls(token, **kwargs)
+            return cls._INSTANCES[token]
+
+    @contextmanager
+    def _state(self) -> Iterator[dict]:
+        with self._thread_lock, open(self.path, "r+", encoding="utf-8") as f:
+            _lock(f)
+            try:
+                contenido = f.read()
+                now = time.time()
+                state = json.loads(contenido) if contenido.strip() else {}
+                state.setdefault("tokens", self.burst)
+                state.setdefault("rate", self.max_rate)
+                state.setdefault("updated", now)
+                state.setdefault("blocked_until", 0.0)
+
+                # Recarga de fichas según el tiempo transcurrido
+                elapsed = max(0.0, now - state["updated"])
+                state["tokens"] = min(self.burst, state["tokens"] + elapsed * state["rate"])
+                state["updated"] = now
+
+                yield state
+
+                f.seek(0)
+                f.truncate()
+                f.write(json.dumps(state))
+                f.flush()
+            finally:
+                _unlock(f)
+
+    def acquire(self, budget: Optional[RunBudget] = None) -> float:
+        """
+        Bloquea hasta obtener una ficha. Devuelve los segundos que se esperó.
+
+        Con `budget`, cada espera se descuenta del presupuesto de la corrida: si la ficha (o la
+        pausa de un `penalize()`) llega después del tiempo restante, lanza `BccrDeadlineError`
+        en lugar de dormir más allá del límite.
+        """
+        esperado = 0.0
+        while True:
+            with self._state() as state:
+                now = state["updated"]
+                if now < state["blocked_until"]:
+                    wait = state["blocked_until"] - now
+                elif state["tokens"] >= 1.0:
+                    state["tokens"] -= 1.0
+                    return esperado
+                else:
+                    wait = (1.0 - state["tokens"]) / state["rate"]
+
+            if budget is not None:
+                budget.sleep(wait)
+            else:
+                time.sleep(wait)
+            esperado += wait
+
+    def penalize(self, retry_after: float) -> None:
+        """
+        Registra un 429: todos los procesos esperan `retry_after` segundos y la tasa baja a la mitad.
+        """
+        with self._state() as state:
+            state["blocked_until"] = max(state["blocked_until"], state["updated"] + retry_after)
+            state["tokens"] = 0.0
+            state["rate"] = max(self.min_rate, state["rate"] / 2)
+            get_logger.warning(
+                "429 compartido: pausa de %.1f s y tasa reducida a %.3f solicitudes/s",
+                retry_after, state["rate"],
+            )
+
+    def reward(self) -> None:
+        """
+        Registra una respuesta exitosa: la tasa se recupera un 5% hasta la tasa configurada.
+        """
+        with self._state() as state:
+            if state["rate"] < self.max_rate:
+                state["rate"] = min(self.max_rate, state["rate"] * 1.05)
@@ -0,0 +1,172 @@
+# -------------------------------------------------------------------------------------
+#  Autor: Marco Espinoza — Consultor
+# Laboratorio de Prospectiva, Innovación e Inteligencia Artificial
+# Fecha: 18-10-2026
+# Descripción del archivo: política de reintentos, circuit breaker y presupuesto de tiempo por corrida
+# -------------------------------------------------------------------------------------
+
+import random
+import threading
+import time
+from typing import Optional
+
+import requests
+
+from sample.utils import logger
+
+get_logger = logger("Retry", "retry.log")
+
+
+class BccrDeadlineError(RuntimeError):
+    """Se lanzó cuando se agotó el presupuesto de tiempo de la corrida."""
+    pass
+
+
+class RetryPolicy:
+    """
+    Reglas de reintento por tipo de falla, con backoff exponencial y jitter completo.
+
+    ...
+
+    Atributos
+    ----------
+    max_retries : int
+        Intentos totales por solicitud.
+    base_delay : float
+        Espera base para 5xx, timeouts y errores de conexión; se duplica en cada intento.
+    rate_limit_delay : float
+        Espera base para 429 sin `Retry-After`.
+    max_delay : float
+        Tope de cualquier espera.
+    retry_statuses : tuple
+        Códigos HTTP 5xx que se consideran transitorios.
+    retry_timeouts : bool
+        Si los timeouts se reintentan. Sin reintento, el timeout se lanza de una vez para que
+        quien llama lo resuelva (por ejemplo `fetch_range` partiendo la ventana).
+    """
+
+    def __init__(
+            self,
+            max_retries: int = 4,
+            base_delay: float = 2.0,
+            rate_limit_delay: float = 20.0,
+            max_delay: float = 60.0,
+            retry_statuses: tuple = (500, 502, 503, 504),
+            retry_timeouts: bool = True,
+        ) -> None:
+
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.rate_limit_delay = rate_limit_delay
+        self.max_delay = max_delay
+        self.retry_statuses = retry_statuses
+        self.retry_timeouts = retry_timeouts
+
+    def without_timeout_retries(self) -> "RetryPolicy":
+        """
+        Copia de la política que reintenta 429, 5xx y errores de conexión, pero no timeouts.
+        """
+        return RetryPolicy(
+            max_retries=self.max_retries,
+            base_delay=self.base_delay,
+            rate_limit_delay=self.rate_limit_delay,
+            max_delay=self.max_delay,
+            retry_statuses=self.retry_statuses,
+            retry_timeouts=False,
+        )
+
+    def classify_status(self, status: int) -> Optional[str]:
+        if status == 429:
+            return "rate_limit"
+        if status in self.retry_statuses:
+            return "server"
+        return None
+
+    @staticmethod
+    def classify_exception(exc: Exception) -> Optional[str]:
+        """
+        `timeout` y `connection` (incluye conexiones reiniciadas) se reintentan; el resto no.
+        """
+        if isinstance(exc, requests.Timeout):
+            return "timeout"
+        if isinstance(exc, requests.ConnectionError):
+            return "connection"
+        return None
+
+    def delay(self, attempt: int, kind: str, retry_after: Optional[float] = None) -> float:
+        """
+        Espera antes del siguiente intento. Para 429 se respeta el `Retry-After` del servidor.
+        """
+        if kind == "rate_limit" and retry_after is not None:
+            return min(self.max_delay, retry_after) + random.uniform(0, 1)
+
+        base = self.rate_limit_delay if kind == "rate_limit" else self.base_delay
+        techo = min(self.max_delay, base * 2 ** (attempt - 1))
+        return random.uniform(techo / 2, techo)
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker compartido por todos los hilos del proceso.
+
+    Tras `threshold` fallas transitorias seguidas (5xx, timeouts, conexión) el circuito se
+    abre y todas las solicitudes esperan `cooldown` segundos antes de volver a intentar.
+    Una respuesta exitosa lo cierra.
+    """
+
+    def __init__(self, threshold: int = 5, cooldown: float = 60.0) -> None:
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._fallas = 0
+        self._abierto_hasta = 0.0
+        self._lock = threading.Lock()
+
+    def wait_time(self) -> float:
+        with self._lock:
+            return max(0.0, self._abierto_hasta - time.monotonic())
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._fallas += 1
+            if self._fallas >= self.threshold and self._abierto_hasta <= time.monotonic():
+                self._abierto_hasta = time.monotonic() + self.cooldown
+                get_logger.error(
+                    "Circuito abierto tras %d fallas seguidas; pausa de %.0f s para todas las solicitudes.",
+                    self._fallas, self.cooldown,
+                )
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._fallas >= self.threshold:
+                get_logger.info("Circuito cerrado: la API volvió a responder.")
+            self._fallas = 0
+            self._abierto_hasta = 0.0
+
+
+class RunBudget:
+    """
+    Presupuesto de tiempo total de una corrida de orquestador. Las esperas y los timeouts
+    de cada solicitud se recortan al tiempo restante; al agotarse se lanza `BccrDeadlineError`.
+    """
+
+    def __init__(self, seconds: float) -> None:
+        self.seconds = seconds
+        self._fin = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self._fin - time.monotonic())
+
+    def check(self) -> None:
+        if self.remaining() <= 0:
+            raise BccrDeadlineError(f"Presupuesto de {self.seconds:.0f} s agotado")
+
+    def sleep(self, seconds: float) -> None:
+        if seconds >= self.remaining():
+            raise BccrDeadlineError(
+                f"La espera de {seconds:.1f} s excede el presupuesto restante ({self.remaining():.1f} s)"
+            )
+        time.sleep(seconds)
+
+
+# Circuit breaker del proceso, compartido por todas las instancias de BccrAPI
+BREAKER = CircuitBreaker()
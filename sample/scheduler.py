@@ -0,0 +1,113 @@
+# -------------------------------------------------------------------------------------
+#  Autor: Marco Espinoza — Consultor
+# Laboratorio de Prospectiva, Innovación e Inteligencia Artificial
+# Fecha: 18-10-2026
+# Descripción del archivo: programación de consultas según la publicación esperada de cada indicador
+# -------------------------------------------------------------------------------------
+
+from datetime import date
+from typing import Optional
+
+import polars as pl
+
+from sample.utils import logger
+
+get_logger = logger("Scheduler", "scheduler.log")
+
+
+class PublicationScheduler:
+    """
+    Decide qué indicadores vale la pena consultar hoy.
+
+    A partir de las últimas observaciones de cada indicador aprende:
+
+    - la separación típica entre observaciones (mediana de días entre fechas), y
+    - el rezago de publicación (percentil 25 de días entre la fecha del dato y su primera
+      extracción), acotado a un periodo para que el calendario nunca salte una publicación.
+
+    Con eso estima la fecha en que debería publicarse el siguiente dato. Un indicador está
+    pendiente si ya pasó esa fecha; tras respuestas vacías seguidas la siguiente consulta se
+    pospone con backoff exponencial, sin superar nunca un periodo completo.
+
+    ...
+
+    Atributos
+    ----------
+    min_historial : int
+        Observaciones mínimas para confiar en la estimación; con menos siempre se consulta.
+    """
+
+    def __init__(self, min_historial: int = 3) -> None:
+        self.min_historial = min_historial
+
+    def learn(self, historial: pl.DataFrame) -> pl.DataFrame:
+        """
+        Estadísticas por indicador a partir de `historial` (`codigo_indicador`, `fecha`, `extraccion_en`).
+
+        `extraccion_en` debe ser la primera vez que se vio cada punto. Si una carga trajo de una
+        vez puntos atrasados, su rezago aparente crece con la antigüedad del punto; por eso el
+        rezago aprendido nunca supera la separación entre observaciones.
+        """
+        stats = (
+            historial
+            .sort("codigo_indicador", "fecha")
+            .with_columns(
+                pl.col("fecha").diff().over("codigo_indicador").dt.total_days().alias("gap"),
+                (pl.col("extraccion_en").dt.date() - pl.col("fecha")).dt.total_days().clip(lower_bound=0).alias("lag"),
+            )
+            .group_by("codigo_indicador")
+            .agg(
+                pl.col("gap").drop_nulls().median().round(0).cast(pl.Int64).alias("gap_dias"),
+                pl.col("lag").quantile(0.25).round(0).cast(pl.Int64).alias("rezago_dias"),
+                pl.len().alias("n_historial"),
+            )
+        )
+        return stats.with_columns(
+            pl.min_horizontal("rezago_dias", "gap_dias").alias("rezago_dias"),
+        )
+
+    def due(self, data: pl.DataFrame, historial: pl.DataFrame, hoy: Optional[date] = None) -> pl.DataFrame:
+        """
+        Filtra `data` (salida de `readData()`, con `ultima_version`, `ultimo_intento` e
+        `intentos_vacios`) a los indicadores pendientes u atrasados a la fecha `hoy`.
+        """
+        hoy = hoy or date.today()
+        stats = self.learn(historial)
+
+        plan = (
+            data
+            .join(stats, on="codigo_indicador", how="left")
+            .with_columns(
+                (pl.col("ultima_version") + pl.duration(days=pl.col("gap_dias"))).alias("proxima_fecha"),
+            )
+            .with_columns(
+                (pl.col("proxima_fecha") + pl.duration(days=pl.col("rezago_dias"))).alias("publicacion_esperada"),
+                # backoff: max(1, periodo/8) días duplicados por cada respuesta vacía, tope de un periodo
+                pl.min_horizontal(
+                    pl.col("gap_dias"),
+                    (pl.max_horizontal(pl.lit(1), pl.col("gap_dias") // 8)
+                     * pl.lit(2).pow(pl.col("intentos_vacios").fill_null(0).clip(lower_bound=1) - 1)),
+                ).alias("backoff_dias"),
+            )
+            .with_columns(
+                (pl.col("ultimo_intento").dt.date() + pl.duration(days=pl.col("backoff_dias"))).alias("proximo_intento"),
+            )
+        )
+
+        sin_historial = (
+            (pl.col("n_historial").fill_null(0) < self.min_historial) | pl.col("gap_dias").is_null()
+        )
+        publicado = pl.lit(hoy) >= pl.col("publicacion_esperada")
+        fuera_de_backoff = (
+            (pl.col("intentos_vacios").fill_null(0) == 0)
+            | pl.col("ultimo_intento").is_null()
+            | (pl.lit(hoy) >= pl.col("proximo_intento"))
+        )
+
+        pendientes = plan.filter(sin_historial | (publicado & fuera_de_backoff))
+
+        get_logger.info(
+            "Programador: %d de %d indicadores pendientes de consulta.",
+            pendientes.height, data.height,
+        )
+        return pendientes.select(data.columns)
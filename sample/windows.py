@@ -0,0 +1,197 @@
+# -------------------------------------------------------------------------------------
+#  Autor: Marco Espinoza — Consultor
+# Laboratorio de Prospectiva, Innovación e Inteligencia Artificial
+# Fecha: 18-10-2026
+# Descripción del archivo: división adaptativa de rangos de fechas para cargas históricas
+# -------------------------------------------------------------------------------------
+
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import polars as pl
+import requests
+
+from sample.core import BccrAPI
+from sample.retry import RunBudget
+from sample.utils import logger
+
+get_logger = logger("Windows", "windows.log")
+
+# Días que cubre cada observación según la periodicidad del indicador
+DIAS_POR_PUNTO: Dict[str, int] = {
+    "Diaria": 1,
+    "Semanal": 7,
+    "Mensual": 31,
+    "Trimestral": 92,
+    "Anual": 366,
+}
+
+Ventana = Tuple[date, date]
+
+
+class WindowPlanner:
+    """
+    Decide cuántos días pedir por solicitud para cada indicador.
+
+    Arranca con `puntos_objetivo` observaciones por ventana según la periodicidad y aprende
+    de las respuestas: si una ventana tardó menos de un cuarto del timeout, la siguiente
+    crece un 50%; si hubo timeout, se reduce a la mitad.
+
+    ...
+
+    Atributos
+    ----------
+    puntos_objetivo : int
+        Observaciones esperadas por solicitud al inicio.
+    max_dias : int
+        Tamaño máximo de una ventana en días.
+    """
+
+    def __init__(self, puntos_objetivo: int = 1500, max_dias: int = 20 * 366) -> None:
+        self.puntos_objetivo = puntos_objetivo
+        self.max_dias = max_dias
+        self._dias: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def min_dias(periodicidad: Optional[str]) -> int:
+        return DIAS_POR_PUNTO.get(periodicidad or "", 1)
+
+    def dias(self, indicador: str, periodicidad: Optional[str]) -> int:
+        with self._lock:
+            if indicador not in self._dias:
+                inicial = self.puntos_objetivo * DIAS_POR_PUNTO.get(periodicidad or "", 1)
+                self._dias[indicador] = min(self.max_dias, inicial)
+            return self._dias[indicador]
+
+    def plan(self, indicador: str, inicio: date, final: date, periodicidad: Optional[str]) -> List[Ventana]:
+        """
+        Divide `[inicio, final]` en ventanas contiguas y sin traslape.
+        """
+        paso = self.dias(indicador, periodicidad)
+        ventanas = []
+        cursor = inicio
+        while cursor <= final:
+            fin = min(final, cursor + timedelta(days=paso - 1))
+            ventanas.append((cursor, fin))
+            cursor = fin + timedelta(days=1)
+        return ventanas
+
+    def record(self, indicador: str, dias: int, segundos: float, timeout: float) -> None:
+        with self._lock:
+            actual = self._dias.get(indicador, dias)
+            if segundos < timeout / 4 and dias >= actual:
+                self._dias[indicador] = min(self.max_dias, int(actual * 1.5))
+
+    def shrink(self, indicador: str, dias: int, periodicidad: Optional[str]) -> None:
+        with self._lock:
+            self._dias[indicador] = max(self.min_dias(periodicidad), min(self._dias.get(indicador, dias), dias // 2))
+
+
+# Planificador compartido del proceso; recuerda lo aprendido entre indicadores y corridas
+PLANNER = WindowPlanner()
+
+
+def fetch_range(
+        indicador: str,
+        fecha_inicio: date,
+        fecha_final: date,
+        periodicidad: Optional[str] = None,
+        api_name: str = "BCCR-INDICADORES",
+        max_workers: int = 4,
+        timeout: float = 20.0,
+        planner: Optional[WindowPlanner] = None,
+        limiter=None,
+        budget: Optional[RunBudget] = None,
+    ) -> pl.DataFrame:
+    """
+    Descarga un rango largo de un indicador dividiéndolo en ventanas que se piden en paralelo.
+    Una ventana que da timeout se parte en dos y se vuelve a pedir sin repetir la misma
+    ventana; los 429 y 5xx siguen la política de reintentos normal. El resultado se une,
+    se deduplica por fecha y se ordena.
+
+    ...
+    Atributos
+    ----------
+    indicador: str
+        Código del indicador.
+    fecha_inicio, fecha_final: date
+        Rango completo a descargar.
+    periodicidad: str
+        Periodicidad del indicador (`Diaria`, `Mensual`, ...); define el tamaño de las ventanas.
+    limiter: AdaptiveConcurrency
+        Limitador de concurrencia opcional compartido con otros indicadores.
+    budget: RunBudget
+        Presupuesto de tiempo de la corrida (opcional).
+    """
+    planner = planner or PLANNER
+    minimo = WindowPlanner.min_dias(periodicidad)
+    politica = BccrAPI.RETRY_POLICY.without_timeout_retries()
+
+    def _tarea(ventana: Ventana) -> pl.DataFrame:
+        api = BccrAPI(
+            api_name=api_name,
+            indicador=indicador,
+            fecha_inicio=ventana[0].strftime("%d/%m/%Y"),
+            fecha_final=ventana[1].strftime("%d/%m/%Y"),
+            timeout=timeout,
+            periodicidad=periodicidad,
+            # 429 y 5xx se reintentan como siempre; el timeout se resuelve partiendo la ventana
+            retry_policy=politica,
+            limiter=limiter,
+            budget=budget,
+        )
+        inicio = time.monotonic()
+        if limiter is not None:
+            with limiter:
+                df = api.read_as_dataframe()
+            limiter.on_success()
+        else:
+            df = api.read_as_dataframe()
+        dias = (ventana[1] - ventana[0]).days + 1
+        planner.record(indicador, dias, time.monotonic() - inicio, timeout)
+        return df
+
+    ventanas = planner.plan(indicador, fecha_inicio, fecha_final, periodicidad)
+    get_logger.info("%s: %d ventanas entre %s y %s", indicador, len(ventanas), fecha_inicio, fecha_final)
+
+    partes: List[pl.DataFrame] = []
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"rango-{indicador}") as pool:
+        pendientes = {pool.submit(_tarea, v): v for v in ventanas}
+
+        while pendientes:
+            hechos, _ = wait(pendientes, return_when=FIRST_COMPLETED)
+            for futuro in hechos:
+                ventana = pendientes.pop(futuro)
+                try:
+                    partes.append(futuro.result())
+                except requests.Timeout:
+                    dias = (ventana[1] - ventana[0]).days + 1
+                    if dias <= minimo:
+                        get_logger.error("%s: timeout en la ventana mínima %s", indicador, ventana)
+                        raise
+                    mitad = ventana[0] + timedelta(days=dias // 2 - 1)
+                    planner.shrink(indicador, dias, periodicidad)
+                    get_logger.warning("%s: timeout en %s — %s, se parte en dos", indicador, *ventana)
+                    for sub in ((ventana[0], mitad), (mitad + timedelta(days=1), ventana[1])):
+                        pendientes[pool.submit(_tarea, sub)] = sub
+
+    partes = [p for p in partes if not p.is_empty()]
+    if not partes:
+        return pl.DataFrame(
+            schema={
+                "fecha": pl.Date,
+                "valorDatoPorPeriodo": pl.Float64,
+                "codigo_indicador": pl.Utf8,
+                "nombre_indicador": pl.Utf8,
+            }
+        )
+
+    return (
+        pl.concat(partes, how="vertical")
+        .unique(subset=["fecha"], keep="last", maintain_order=True)
+        .sort("fecha")
+    )
@@ -0,0 +1,302 @@
+# -------------------------------------------------------------------------------------
+#  Autor: Marco Espinoza — Consultor
+# Laboratorio de Prospectiva, Innovación e Inteligencia Artificial
+# Fecha: 18-10-2026
+# Descripción del archivo: cola de trabajo en PostgreSQL para repartir indicadores entre workers
+# -------------------------------------------------------------------------------------
+
+import threading
+from contextlib import contextmanager
+from typing import Callable, Iterator, List, Optional
+
+import polars as pl
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from sample.helpers import get_engine
+from sample.utils import logger
+
+get_logger = logger("WorkQueue", "workqueue.log")
+
+
+class WorkQueue:
+    """
+    Cola de unidades (indicador, ventana) en `bccr_sch.cola_trabajo`.
+
+    Los workers reclaman lotes con `SELECT ... FOR UPDATE SKIP LOCKED`, así dos workers nunca
+    toman la misma unidad. Cada reclamo es un arriendo de `lease` segundos que el worker
+    renueva mientras procesa (`heartbeat`). Si un worker muere, sus unidades vuelven a la cola
+    al vencer el arriendo. Una unidad que falla `max_intentos` veces queda en `failed`.
+
+    Renovar, devolver, fallar o terminar una unidad solo tiene efecto si sigue arrendada por el
+    mismo worker: uno cuyo arriendo venció y otro reclamó ya no puede cambiar su estado.
+
+    ...
+
+    Atributos
+    ----------
+    cola : str
+        Nombre de la cola; permite varias actualizaciones independientes en la misma tabla.
+    lease : float
+        Duración del arriendo en segundos.
+    max_intentos : int
+        Reclamos máximos por unidad antes de darla por fallida.
+    engine : Engine
+        Engine de SQLAlchemy; por defecto el pool compartido de `get_engine()`.
+
+    Métodos
+    ----------
+    queue = WorkQueue("cadencias")
+    queue.enqueue(data)
+        Encola la salida de `TidyJob()`.
+    queue.claim("host-123", 20)
+        Reclama hasta 20 unidades.
+    with queue.heartbeat("host-123", ids):
+        Renueva el arriendo mientras se procesa el lote.
+    queue.on_done(ids, "host-123")
+        Callback para `CrudoBulkWriter.add(..., on_flush=...)`.
+    """
+
+    def __init__(
+            self,
+            cola: str = "default",
+            lease: float = 600.0,
+            max_intentos: int = 3,
+            engine: Optional[Engine] = None,
+        ) -> None:
+
+        self.cola = cola
+        self.lease = lease
+        self.max_intentos = max_intentos
+        self.engine = engine or get_engine()
+
+        with open("./orquestador/sql/cola_trabajo.sql", "r") as f:
+            ddl = f.read()
+        with self.engine.begin() as conn:
+            conn.execute(text(ddl))
+
+    def enqueue(self, data: pl.DataFrame) -> int:
+        """
+        Encola las unidades de `data` (salida de `TidyJob()`). Una unidad repetida que ya
+        terminó (`done` o `failed`) vuelve a `pending` con sus intentos en cero: si el indicador
+        no trajo datos nuevos su marca de agua no avanza y la siguiente corrida pide la misma
+        ventana. Las que siguen pendientes o arrendadas se dejan como están.
+        Devuelve la cantidad de unidades nuevas o reabiertas.
+        """
+        if data.is_empty():
+            return 0
+
+        filas = [
+            {
+                "cola": self.cola,
+                "codigo": row["codigo_indicador"],
+                "periodicidad": row.get("periodicidad"),
+                "inicio": row["fecha_inicio"],
+                "final": row["fecha_final"],
+            }
+            for row in data.iter_rows(named=True)
+        ]
+        with self.engine.begin() as conn:
+            result = conn.execute(text(
+                """
+                insert into bccr_sch.cola_trabajo
+                    (cola, codigo_indicador, periodicidad, fecha_inicio, fecha_final)
+                values (:cola, :codigo, :periodicidad, :inicio, :final)
+                on conflict (cola, codigo_indicador, fecha_inicio, fecha_final) do update
+                set estado = 'pending',
+                    intentos = 0,
+                    periodicidad = excluded.periodicidad,
+                    worker = null,
+                    lease_hasta = null,
+                    error = null,
+                    actualizado_en = now()
+                where cola_trabajo.estado in ('done', 'failed')
+                """
+            ), filas)
+
+        nuevas = max(result.rowcount, 0)
+        get_logger.info("Cola %s: %d unidades nuevas o reabiertas de %d", self.cola, nuevas, len(filas))
+        return nuevas
+
+    def claim(self, worker: str, n: int = 20) -> pl.DataFrame:
+        """
+        Reclama hasta `n` unidades disponibles (pendientes o con el arriendo vencido).
+        Las unidades con el arriendo vencido que ya agotaron sus intentos pasan a `failed`.
+        Devuelve un DataFrame con `id` y las columnas de `TidyJob()`; vacío si no queda trabajo.
+        """
+        with self.engine.begin() as conn:
+            vencidas = conn.execute(text(
+                """
+                update bccr_sch.cola_trabajo
+                set estado = 'failed',
+                    lease_hasta = null,
+                    error = coalesce(error, 'Arriendo vencido sin terminar tras ' || intentos || ' intentos'),
+                    actualizado_en = now()
+                where cola = :cola
+                  and estado = 'leased'
+                  and lease_hasta < now()
+                  and intentos >= :max_intentos
+                """
+            ), {"cola": self.cola, "max_intentos": self.max_intentos}).rowcount
+            if vencidas > 0:
+                get_logger.warning("Cola %s: %d unidades vencidas agotaron sus intentos", self.cola, vencidas)
+
+            filas = conn.execute(text(
+                """
+                with lote as (
+                    select id
+                    from bccr_sch.cola_trabajo
+                    where cola = :cola
+                      and (estado = 'pending' or (estado = 'leased' and lease_hasta < now()))
+                      and intentos < :max_intentos
+                    order by id
+                    limit :n
+                    for update skip locked
+                )
+                update bccr_sch.cola_trabajo c
+                set estado = 'leased',
+                    worker = :worker,
+                    intentos = c.intentos + 1,
+                    lease_hasta = now() + make_interval(secs => :lease),
+                    actualizado_en = now()
+                from lote
+                where c.id = lote.id
+                returning c.id, c.codigo_indicador, c.periodicidad, c.fecha_inicio, c.fecha_final
+                """
+            ), {
+                "cola": self.cola,
+                "max_intentos": self.max_intentos,
+                "n": n,
+                "worker": worker,
+                "lease": self.lease,
+            }).all()
+
+        return pl.DataFrame(
+            [tuple(f) for f in filas],
+            schema={
+                "id": pl.Int64,
+                "codigo_indicador": pl.Utf8,
+                "periodicidad": pl.Utf8,
+                "fecha_inicio": pl.Utf8,
+                "fecha_final": pl.Utf8,
+            },
+            orient="row",
+        )
+
+    def extend(self, ids: List[int], worker: str) -> None:
+        """
+        Renueva el arriendo de las unidades que `worker` sigue teniendo arrendadas.
+        """
+        if not ids:
+            return
+        with self.engine.begin() as conn:
+            renovadas = conn.execute(text(
+                """
+                update bccr_sch.cola_trabajo
+                set lease_hasta = now() + make_interval(secs => :lease)
+                where id = any(:ids) and estado = 'leased' and worker = :worker
+                """
+            ), {"lease": self.lease, "ids": list(ids), "worker": worker}).rowcount
+        get_logger.debug("Cola %s: %s renovó %d arriendos", self.cola, worker, renovadas)
+
+    @contextmanager
+    def heartbeat(self, worker: str, ids: List[int]) -> Iterator[None]:
+        """
+        Renueva el arriendo de `ids` cada `lease / 3` segundos mientras dura el bloque, así una
+        unidad lenta (o que espera el COPY de su lote) no pierde el arriendo a mitad del proceso.
+        Las unidades ya terminadas o fallidas no se tocan.
+        """
+        ids = list(ids)
+        fin = threading.Event()
+
+        def _renovar() -> None:
+            while not fin.wait(self.lease / 3):
+                try:
+                    self.extend(ids, worker)
+                except Exception as err:
+                    get_logger.warning("Cola %s: no se pudo renovar el arriendo de %s: %s", self.cola, worker, err)
+
+        hilo = threading.Thread(target=_renovar, name="workqueue-heartbeat", daemon=True)
+        hilo.start()
+        try:
+            yield
+        finally:
+            fin.set()
+            hilo.join()
+
+    def release(self, ids: List[int], worker: str) -> None:
+        """
+        Devuelve unidades a la cola sin contarlas como intento fallido.
+        """
+        if not ids:
+            return
+        with self.engine.begin() as conn:
+            conn.execute(text(
+                """
+                update bccr_sch.cola_trabajo
+                set estado = 'pending',
+                    intentos = greatest(intentos - 1, 0),
+                    lease_hasta = null,
+                    actualizado_en = now()
+                where id = any(:ids) and estado = 'leased' and worker = :worker
+                """
+            ), {"ids": list(ids), "worker": worker})
+
+    def fail(self, id_: int, error: BaseException | str, worker: str) -> None:
+        """
+        Devuelve la unidad a la cola, o la deja en `failed` si agotó sus intentos.
+        """
+        with self.engine.begin() as conn:
+            filas = conn.execute(text(
+                """
+                update bccr_sch.cola_trabajo
+                set estado = case when intentos >= :max_intentos then 'failed' else 'pending' end,
+                    lease_hasta = null,
+                    error = :error,
+                    actualizado_en = now()
+                where id = :id and estado = 'leased' and worker = :worker
+                """
+            ), {"max_intentos": self.max_intentos, "error": str(error)[:2000], "id": id_, "worker": worker}).rowcount
+        if filas == 0:
+            get_logger.warning(
+                "Cola %s: la unidad %d ya no está arrendada por %s; no se marca como fallida",
+                self.cola, id_, worker,
+            )
+
+    def on_done(self, ids: List[int], worker: str) -> Callable:
+        """
+        Devuelve un callback `on_flush(cursor)` que marca las unidades como `done` dentro de la
+        transacción del COPY que carga sus filas.
+        """
+        ids = list(ids)
+
+        def _callback(cur) -> None:
+            cur.execute(
+                """
+                update bccr_sch.cola_trabajo
+                set estado = 'done', lease_hasta = null, error = null, actualizado_en = now()
+                where id = any(%s) and estado = 'leased' and worker = %s
+                """,
+                (ids, worker),
+            )
+            if cur.rowcount < len(ids):
+                get_logger.warning(
+                    "Cola %s: %d de %d unidades ya no están arrendadas por %s; no se marcan como terminadas",
+                    self.cola, len(ids) - cur.rowcount, len(ids), worker,
+                )
+        return _callback
+
+    def resumen(self) -> dict:
+        """
+        Cantidad de unidades por estado en la cola.
+        """
+        with self.engine.connect() as conn:
+            filas = conn.execute(text(
+                """
+                select estado, count(*)
+                from bccr_sch.cola_trabajo
+                where cola = :cola
+                group by estado
+                """
+            ), {"cola": self.cola}).all()
+        return {estado: n for estado, n in filas}
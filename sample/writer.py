@@ -0,0 +1,254 @@
+# -------------------------------------------------------------------------------------
+#  Autor: Marco Espinoza — Consultor
+# Laboratorio de Prospectiva, Innovación e Inteligencia Artificial
+# Fecha: 18-10-2026
+# Descripción del archivo: escritura masiva a bccr_sch.indicador_crudo con COPY
+# -------------------------------------------------------------------------------------
+
+import threading
+import time
+from datetime import datetime
+from io import BytesIO
+from typing import Callable, List, Optional
+
+import polars as pl
+from sqlalchemy.engine import Engine
+
+from sample.cdc import ChangeDetector
+from sample.helpers import get_engine
+from sample.utils import logger
+
+get_logger = logger("Writer", "writer.log")
+
+# Columnas de bccr_sch.indicador_crudo que llena la ingesta (crudo_id es serial)
+CRUDO_COLUMNS = [
+    "fuente_datos",
+    "ingestion_run_id",
+    "extraccion_en",
+    "codigo_indicador",
+    "nombre_indicador",
+    "fecha",
+    "valorDatoPorPeriodo",
+]
+
+
+class BulkWriteError(RuntimeError):
+    """Se lanzó cuando falló el COPY de un lote; las unidades del lote ya recibieron el error."""
+    pass
+
+
+def normalize_crudo(df: pl.DataFrame) -> pl.DataFrame:
+    """
+    Completa las columnas con valor por defecto y ordena el DataFrame según `CRUDO_COLUMNS`.
+    """
+    if "fuente_datos" not in df.columns:
+        df = df.with_columns(pl.lit("api_bccr").alias("fuente_datos"))
+    if "extraccion_en" not in df.columns:
+        df = df.with_columns(pl.lit(datetime.now()).alias("extraccion_en"))
+
+    return df.select(
+        pl.col("fuente_datos").cast(pl.Utf8),
+        pl.col("ingestion_run_id").cast(pl.Utf8),
+        pl.col("extraccion_en").cast(pl.Datetime("us")),
+        pl.col("codigo_indicador").cast(pl.Utf8),
+        pl.col("nombre_indicador").cast(pl.Utf8),
+        pl.col("fecha").cast(pl.Date),
+        pl.col("valorDatoPorPeriodo").cast(pl.Float64),
+    )
+
+
+class CrudoBulkWriter:
+    """
+    Acumula DataFrames normalizados de muchos indicadores y los carga a
+    `bccr_sch.indicador_crudo` con `COPY ... FROM STDIN`, una transacción por descarga.
+
+    Es seguro usarlo desde varios hilos a la vez (por ejemplo desde las etapas de `ingest_pipeline`).
+    Un hilo de fondo descarga el lote cuando pasa `flush_interval` aunque no lleguen más filas.
+
+    Con `solo_cambios` (por defecto) cada DataFrame pasa por `ChangeDetector` al agregarse: solo
+    entran al lote los puntos nuevos o revisados, sea cual sea la ruta que escribe (orquestador,
+    carga histórica o `BccrAPI.get()`).
+
+    Si el COPY de un lote falla, el error se entrega al `on_error` de cada unidad del lote (no
+    solo a la que disparó la descarga) y sus filas se descartan: cada unidad queda como fallida
+    y se vuelve a pedir en otra corrida.
+
+    ...
+
+    Atributos
+    ----------
+    engine : Engine
+        Engine de SQLAlchemy; por defecto el pool compartido de `get_engine()`.
+    flush_rows : int
+        Cantidad de filas acumuladas que dispara una descarga.
+    flush_interval : float
+        Segundos máximos que un lote espera en memoria.
+    table : str
+        Tabla destino.
+    cdc : ChangeDetector
+        Detector de cambios; None si se escriben todas las filas recibidas.
+
+    Métodos
+    ----------
+    with CrudoBulkWriter() as writer:
+        writer.add(df)
+    """
+
+    def __init__(
+            self,
+            engine: Optional[Engine] = None,
+            flush_rows: int = 50_000,
+            flush_interval: float = 30.0,
+            table: str = "bccr_sch.indicador_crudo",
+            cdc: Optional[ChangeDetector] = None,
+            solo_cambios: bool = True,
+        ) -> None:
+
+        self.engine = engine or get_engine()
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.table = table
+        self.cdc = cdc or (ChangeDetector(self.engine) if solo_cambios else None)
+
+        self._buffer: List[pl.DataFrame] = []
+        self._on_flush: List[Callable] = []
+        self._on_error: List[Callable] = []
+        self._rows = 0
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self.total_rows = 0
+
+        # Descarga por tiempo aunque nadie llame add()
+        self._cerrado = threading.Event()
+        self._timer = threading.Thread(target=self._flush_periodico, name="writer-flush", daemon=True)
+        self._timer.start()
+
+    def _flush_periodico(self) -> None:
+        while not self._cerrado.wait(min(1.0, self.flush_interval)):
+            with self._lock:
+                if time.monotonic() - self._last_flush >= self.flush_interval:
+                    self._flush_silencioso()
+
+    def add(
+            self,
+            df: pl.DataFrame,
+            on_flush: Optional[Callable] = None,
+            on_error: Optional[Callable[[BaseException], None]] = None,
+        ) -> None:
+        """
+        Agrega un DataFrame al lote en memoria y descarga si se alcanzó el tamaño o el intervalo.
+        Con detector de cambios, solo se agregan los puntos nuevos o revisados; la consulta se
+        hace antes de tomar el candado, así varios hilos pueden filtrar a la vez.
+
+        `on_flush(cursor)` se ejecuta dentro de la misma transacción del COPY que carga estas
+        filas (aunque el DataFrame venga vacío); sirve para registrar avance de forma atómica.
+        `on_error(error)` se llama si ese COPY falla, sin importar qué hilo disparó la descarga.
+        """
+        if self.cdc is not None and not df.is_empty():
+            df = self.cdc.filter(df)
+        if df.is_empty() and on_flush is None:
+            return
+
+        with self._lock:
+            if not df.is_empty():
+                self._buffer.append(normalize_crudo(df))
+                self._rows += df.height
+            if on_flush is not None:
+                self._on_flush.append(on_flush)
+            if on_error is not None:
+                self._on_error.append(on_error)
+
+            vencido = time.monotonic() - self._last_flush >= self.flush_interval
+            if self._rows >= self.flush_rows or vencido:
+                self._flush_silencioso()
+
+    def flush(self) -> int:
+        """
+        Carga todo lo acumulado en una sola transacción. Devuelve la cantidad de filas escritas.
+        Lanza `BulkWriteError` si el COPY falla (después de avisar a las unidades del lote).
+        """
+        with self._lock:
+            return self._flush_locked()
+
+    def _flush_silencioso(self) -> None:
+        """
+        Descarga desde `add()` o el hilo de fondo: un error ya se entregó a las unidades del
+        lote, así que no se lanza en el hilo que por casualidad disparó la descarga.
+        """
+        try:
+            self._flush_locked()
+        except BulkWriteError:
+            pass
+
+    def _flush_locked(self) -> int:
+        self._last_flush = time.monotonic()
+        if not self._buffer and not self._on_flush:
+            return 0
+
+        lote = (
+            pl.concat(self._buffer, how="vertical", rechunk=True)
+            if self._buffer
+            else pl.DataFrame(schema={c: pl.Utf8 for c in CRUDO_COLUMNS})
+        )
+
+        buf = BytesIO()
+        lote.write_csv(buf, include_header=False, datetime_format="%Y-%m-%d %H:%M:%S%.f")
+        buf.seek(0)
+
+        columnas = ", ".join(f'"{c}"' for c in CRUDO_COLUMNS)
+        copy_sql = f"COPY {self.table} ({columnas}) FROM STDIN WITH (FORMAT csv)"
+
+        raw = self.engine.raw_connection()
+        try:
+            with raw.cursor() as cur:
+                if lote.height > 0:
+                    cur.copy_expert(copy_sql, buf)
+                for callback in self._on_flush:
+                    callback(cur)
+            raw.commit()
+        except Exception as err:
+            raw.rollback()
+            get_logger.error(
+                "Falló el COPY de %d filas a %s (%d unidades): %s",
+                lote.height, self.table, len(self._on_flush), err,
+            )
+            on_error = list(self._on_error)
+            self._vaciar()
+            for callback in on_error:
+                try:
+                    callback(err)
+                except Exception as cb_err:
+                    get_logger.error("Error al reportar la falla del COPY: %s", cb_err)
+            raise BulkWriteError(f"Falló el COPY de {lote.height} filas a {self.table}: {err}") from err
+        finally:
+            raw.close()
+
+        self._vaciar()
+        self.total_rows += lote.height
+        get_logger.info("COPY completado: %d filas en %s", lote.height, self.table)
+
+        return lote.height
+
+    def _vaciar(self) -> None:
+        self._buffer.clear()
+        self._on_flush.clear()
+        self._on_error.clear()
+        self._rows = 0
+
+    def close(self) -> None:
+        """
+        Detiene el hilo de fondo y carga lo pendiente. Un error del último COPY ya se entregó a
+        las unidades del lote y queda en el log; no se lanza al salir del `with`.
+        """
+        self._cerrado.set()
+        self._timer.join()
+        with self._lock:
+            self._flush_silencioso()
+        if self.cdc is not None:
+            get_logger.info("Detección de cambios: %s", self.cdc.resumen())
+
+    def __enter__(self) -> "CrudoBulkWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
@@ -0,0 +1,69 @@
+-- Calendario pre-generado para curado_sch.dim_fecha.
+-- Agrega los atributos de calendario y la función que llena un rango de fechas en un solo
+-- insert. La población inicial la hace `python -m sample.calendario` (por defecto 1900–2100).
+-- Así las cargas ya no derivan dim_fecha de indicador_crudo.
+
+alter table curado_sch.dim_fecha
+	add column if not exists anio smallint,
+	add column if not exists trimestre smallint,
+	add column if not exists mes smallint,
+	add column if not exists dia smallint,
+	add column if not exists dia_semana smallint,       -- ISO: 1 = lunes ... 7 = domingo
+	add column if not exists semana_iso smallint,
+	add column if not exists anio_iso smallint,
+	add column if not exists dia_del_anio smallint,
+	add column if not exists es_fin_semana boolean,      -- sábado o domingo
+	add column if not exists es_fin_mes boolean,
+	add column if not exists es_fin_trimestre boolean,
+	add column if not exists es_fin_anio boolean;
+
+create index if not exists ix_dim_fecha_anio_mes on curado_sch.dim_fecha(anio, mes);
+create index if not exists ix_dim_fecha_anio_trimestre on curado_sch.dim_fecha(anio, trimestre);
+create index if not exists ix_dim_fecha_anio_iso_semana on curado_sch.dim_fecha(anio_iso, semana_iso);
+
+create or replace function curado_sch.poblar_calendario(desde date, hasta date)
+returns integer
+language sql
+as $$
+	with dias as (
+		select d::date as fecha
+		from generate_series(desde, hasta, interval '1 day') as g(d)
+	),
+	upsert as (
+		insert into curado_sch.dim_fecha (
+			date_key, fecha, anio, trimestre, mes, dia, dia_semana, semana_iso, anio_iso,
+			dia_del_anio, es_fin_semana, es_fin_mes, es_fin_trimestre, es_fin_anio
+		)
+		select
+			to_char(fecha, 'YYYYMMDD')::int,
+			fecha,
+			extract(year from fecha)::smallint,
+			extract(quarter from fecha)::smallint,
+			extract(month from fecha)::smallint,
+			extract(day from fecha)::smallint,
+			extract(isodow from fecha)::smallint,
+			extract(week from fecha)::smallint,
+			extract(isoyear from fecha)::smallint,
+			extract(doy from fecha)::smallint,
+			extract(isodow from fecha) in (6, 7),
+			fecha = (date_trunc('month', fecha) + interval '1 month - 1 day')::date,
+			fecha = (date_trunc('quarter', fecha) + interval '3 month - 1 day')::date,
+			extract(month from fecha) = 12 and extract(day from fecha) = 31
+		from dias
+		on conflict (date_key) do update
+		set anio = excluded.anio,
+			trimestre = excluded.trimestre,
+			mes = excluded.mes,
+			dia = excluded.dia,
+			dia_semana = excluded.dia_semana,
+			semana_iso = excluded.semana_iso,
+			anio_iso = excluded.anio_iso,
+			dia_del_anio = excluded.dia_del_anio,
+			es_fin_semana = excluded.es_fin_semana,
+			es_fin_mes = excluded.es_fin_mes,
+			es_fin_trimestre = excluded.es_fin_trimestre,
+			es_fin_anio = excluded.es_fin_anio
+		returning 1
+	)
+	select count(*)::int from upsert;
+$$;
@@ -1,19 +1,27 @@
--- Creamos un CTE
--- dim_fecha
-with dim_date_cte as (
-	select
-		fecha
-	from bccr_sch.indicador_crudo
-)
-
-insert into curado_sch.dim_fecha(
-	date_key, fecha
-)
+-- Rango de crudo_id de esta carga: desde la marca de agua de la curación (esas filas ya están
+-- en los hechos) hasta el último crudo_id al empezar. Los hechos se cargan hasta ese tope y la
+-- marca de agua avanza a él al final, igual que en carga_incremental.sql.
+drop table if exists tmp_carga_rango;
+create temporary table tmp_carga_rango as
 select
-	to_char(fecha, 'YYYYMMDD')::int,
-	fecha
-from dim_date_cte
-on conflict (date_key) do nothing;
+	coalesce((select ultimo_crudo_id from curado_sch.carga_watermark where proceso = 'fct_indicador'), 0) as desde,
+	coalesce((select max(crudo_id) from bccr_sch.indicador_crudo), 0) as hasta;
+
+-- dim_fecha: es un calendario pre-generado (sql/calendario.sql, `python -m sample.calendario`);
+-- la carga solo lo extiende si las filas nuevas de indicador_crudo traen fechas fuera del rango
+-- generado, así los hechos nunca apuntan a una fecha inexistente. Las filas hasta la marca de
+-- agua ya pasaron por aquí: solo se revisan las de crudo_id mayor (índice de la llave primaria).
+-- Requiere haber corrido sql/calendario.sql.
+select curado_sch.poblar_calendario(min(c.fecha), max(c.fecha))
+from bccr_sch.indicador_crudo c
+where c.crudo_id > (select desde from tmp_carga_rango)
+  and c.crudo_id <= (select hasta from tmp_carga_rango)
+  and not exists (
+	select 1
+	from curado_sch.dim_fecha d
+	where d.fecha = c.fecha
+)
+having count(*) > 0;
 
 -- dim_fuente
 
@@ -99,6 +107,7 @@ with ultimo_por_dia_cte as (
 			order by ic.extraccion_en desc
 		) as rn
 	from bccr_sch.indicador_crudo ic
+	where ic.crudo_id <= (select hasta from tmp_carga_rango)
 ),
 resuelto_cte as (
 	select
@@ -106,7 +115,8 @@ resuelto_cte as (
 		to_char(l.fecha, 'YYYYMMDD')::int date_key,
 		l."valorDatoPorPeriodo" as valor_indicador,
 		ds.source_key,
-		dr.run_key
+		dr.run_key,
+		dr.extraccion_en
 	from ultimo_por_dia_cte l
 	join curado_sch.dim_indicador di
 		on di.codigo_indicador = l.codigo_indicador and di.is_current = true 
@@ -115,26 +125,59 @@ resuelto_cte as (
 	join curado_sch.dim_run dr 
 		on dr.ingestion_run_id  = l.ingestion_run_id 
 	where l.rn = 1
+),
+-- las revisiones se guardan antes del upsert: el CTE ve los hechos previos a esta carga
+revision_cte as (
+	insert into curado_sch.fct_indicador_revision (
+		indicador_key, date_key, valid_from_run_key, valid_from, valorind
+	)
+	select r.indicador_key, r.date_key, r.run_key, r.extraccion_en, r.valor_indicador
+	from resuelto_cte r
+	left join curado_sch.fct_indicador f
+		on f.indicador_key = r.indicador_key
+		and f.date_key = r.date_key
+	where f.fact_id is null
+		or f.valorind is distinct from r.valor_indicador
+	on conflict do nothing
+),
+upsert_cte as (
+	insert into curado_sch.fct_indicador (
+		indicador_key, date_key, valorind, source_key, last_run_key
+	)
+	select indicador_key, date_key, valor_indicador, source_key, run_key
+	from resuelto_cte
+	on conflict (indicador_key, date_key) do update 
+	set valorind = excluded.valorind,
+		last_run_key = excluded.last_run_key,
+		row_loaded_at = now()
+	returning indicador_key, date_key, last_run_key
 )
-insert into curado_sch.fct_indicador (
-	indicador_key, date_key, valorind, source_key, last_run_key
+-- la marca de agua se actualiza en la misma sentencia del upsert
+insert into curado_sch.indicador_watermark as w (
+	indicador_key, primera_fecha, ultima_fecha, last_run_key
 )
-select indicador_key, date_key, valor_indicador, source_key, run_key
-from resuelto_cte
-on conflict (indicador_key, date_key) do update 
-set valorind = excluded.valorind,
-	last_run_key = excluded.last_run_key,
-	row_loaded_at = now();
-
- 
-
-
-
-
-
-
-
-
-
-
-
+select
+	indicador_key,
+	to_date(min(date_key)::text, 'YYYYMMDD'),
+	to_date(max(date_key)::text, 'YYYYMMDD'),
+	max(last_run_key)
+from upsert_cte
+group by indicador_key
+on conflict (indicador_key) do update
+set primera_fecha = least(w.primera_fecha, excluded.primera_fecha),
+	ultima_fecha = greatest(w.ultima_fecha, excluded.ultima_fecha),
+	last_run_key = greatest(w.last_run_key, excluded.last_run_key),
+	actualizado_en = now();
+
+-- La curación incremental sigue desde el tope de esta carga
+update curado_sch.carga_watermark w
+set ultimo_crudo_id = greatest(w.ultimo_crudo_id, r.hasta),
+	actualizado_en = now()
+from tmp_carga_rango r
+where w.proceso = 'fct_indicador';
+
+drop table tmp_carga_rango;
+
+-- Avisa al app (LISTEN bccr_curado) que hay datos nuevos; se entrega al confirmar la transacción
+select pg_notify('bccr_curado', coalesce(max(run_key), 0)::text)
+from curado_sch.dim_run;
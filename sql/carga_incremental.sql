@@ -0,0 +1,147 @@
+-- Curación incremental: lleva a las dimensiones y a la tabla de hechos solo las filas de
+-- indicador_crudo con :desde < crudo_id <= :hasta. La corre sample/curation.py dentro de una
+-- transacción que también avanza curado_sch.carga_watermark.
+
+-- Filas nuevas (rango de la llave primaria, sin recorrer el resto de la tabla)
+create temporary table tmp_crudo_nuevo on commit drop as
+select
+	crudo_id,
+	fuente_datos,
+	ingestion_run_id,
+	extraccion_en,
+	codigo_indicador,
+	fecha,
+	"valorDatoPorPeriodo"
+from bccr_sch.indicador_crudo
+where crudo_id > :desde
+  and crudo_id <= :hasta;
+
+analyze tmp_crudo_nuevo;
+
+-- dim_fecha: calendario pre-generado (sql/calendario.sql); solo se extiende si el lote trae
+-- fechas fuera del rango generado (búsqueda por índice en dim_fecha.fecha)
+select curado_sch.poblar_calendario(min(n.fecha), max(n.fecha))
+from tmp_crudo_nuevo n
+where not exists (
+	select 1
+	from curado_sch.dim_fecha d
+	where d.fecha = n.fecha
+)
+having count(*) > 0;
+
+-- dim_fuente
+insert into curado_sch.dim_fuente (fuente_datos)
+select distinct fuente_datos
+from tmp_crudo_nuevo
+on conflict (fuente_datos) do nothing;
+
+-- dim_run
+insert into curado_sch.dim_run(ingestion_run_id, extraccion_en)
+select ingestion_run_id, min(extraccion_en)
+from tmp_crudo_nuevo
+group by ingestion_run_id
+on conflict (ingestion_run_id) do nothing;
+
+-- dim_indicador: solo se agregan los indicadores nuevos del lote; los cambios de atributos
+-- del catálogo (SCD tipo 2) siguen en la carga completa de carga_datos.sql
+insert into curado_sch.dim_indicador(
+	codigo_indicador, nombre_indicador, descripcion_indicador, indicador,
+	periodicidad, cuadro, titulocuadro, valid_from, valid_to, is_current, watermark, hashdiff
+)
+select
+	c.codigo, c.nombre, c.descripcion, c.indicador, c.periodicidad, c.cuadro, c.titulocuadro,
+	now(), null, true, c.watermark,
+	decode(md5(coalesce(c.nombre, '') ||'|'|| coalesce(c.codigo)),'hex')
+from bccr_sch.catalogo c
+where c.codigo in (select distinct codigo_indicador from tmp_crudo_nuevo)
+  and not exists (
+	select 1
+	from curado_sch.dim_indicador d
+	where d.codigo_indicador = c.codigo
+	  and d.is_current = true
+  );
+
+-- fct table
+with ultimo_por_dia_cte as (
+	select
+		n.codigo_indicador,
+		n.fecha,
+		n."valorDatoPorPeriodo",
+		n.fuente_datos,
+		n.ingestion_run_id,
+		row_number() over(
+			partition by n.codigo_indicador, n.fecha
+			order by n.extraccion_en desc, n.crudo_id desc
+		) as rn
+	from tmp_crudo_nuevo n
+),
+resuelto_cte as (
+	select
+		di.indicador_key,
+		to_char(l.fecha, 'YYYYMMDD')::int date_key,
+		l."valorDatoPorPeriodo" as valor_indicador,
+		ds.source_key,
+		dr.run_key,
+		dr.extraccion_en
+	from ultimo_por_dia_cte l
+	join curado_sch.dim_indicador di
+		on di.codigo_indicador = l.codigo_indicador and di.is_current = true
+	join curado_sch.dim_fuente ds
+		on ds.fuente_datos = l.fuente_datos
+	join curado_sch.dim_run dr
+		on dr.ingestion_run_id = l.ingestion_run_id
+	where l.rn = 1
+),
+-- las revisiones se guardan antes del upsert: el CTE ve los hechos previos a esta carga
+revision_cte as (
+	insert into curado_sch.fct_indicador_revision (
+		indicador_key, date_key, valid_from_run_key, valid_from, valorind
+	)
+	select r.indicador_key, r.date_key, r.run_key, r.extraccion_en, r.valor_indicador
+	from resuelto_cte r
+	left join curado_sch.fct_indicador f
+		on f.indicador_key = r.indicador_key
+		and f.date_key = r.date_key
+	where f.fact_id is null
+		or f.valorind is distinct from r.valor_indicador
+	on conflict do nothing
+),
+upsert_cte as (
+	insert into curado_sch.fct_indicador (
+		indicador_key, date_key, valorind, source_key, last_run_key
+	)
+	select indicador_key, date_key, valor_indicador, source_key, run_key
+	from resuelto_cte
+	on conflict (indicador_key, date_key) do update
+	set valorind = excluded.valorind,
+		last_run_key = excluded.last_run_key,
+		row_loaded_at = now()
+	returning indicador_key, date_key, last_run_key
+)
+-- la marca de agua por indicador se actualiza en la misma sentencia del upsert
+insert into curado_sch.indicador_watermark as w (
+	indicador_key, primera_fecha, ultima_fecha, last_run_key
+)
+select
+	indicador_key,
+	to_date(min(date_key)::text, 'YYYYMMDD'),
+	to_date(max(date_key)::text, 'YYYYMMDD'),
+	max(last_run_key)
+from upsert_cte
+group by indicador_key
+on conflict (indicador_key) do update
+set primera_fecha = least(w.primera_fecha, excluded.primera_fecha),
+	ultima_fecha = greatest(w.ultima_fecha, excluded.ultima_fecha),
+	last_run_key = greatest(w.last_run_key, excluded.last_run_key),
+	actualizado_en = now();
+
+-- Avanza la marca de agua de la curación en la misma transacción
+update curado_sch.carga_watermark
+set ultimo_crudo_id = :hasta,
+	filas_procesadas = filas_procesadas + (select count(*) from tmp_crudo_nuevo),
+	actualizado_en = now()
+where proceso = 'fct_indicador';
+
+-- Avisa al app (LISTEN bccr_curado) que hay datos nuevos; se entrega al confirmar la transacción
+select pg_notify('bccr_curado', coalesce(max(run_key), 0)::text)
+from curado_sch.dim_run;
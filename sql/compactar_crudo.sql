@@ -0,0 +1,40 @@
+-- Compactación de bccr_sch.indicador_crudo para las extracciones entre :desde y :hasta.
+-- Conserva, por (codigo_indicador, fecha):
+-- - la primera versión,
+-- - las revisiones reales (el valor cambió respecto a la versión anterior),
+-- - la última versión.
+-- Borra las descargas repetidas que no cambiaron nada.
+with claves as (
+	select distinct codigo_indicador, fecha
+	from bccr_sch.indicador_crudo
+	where extraccion_en >= :desde
+	  and extraccion_en < :hasta
+),
+versiones as (
+	select
+		ic.crudo_id,
+		ic.extraccion_en,
+		row_number() over asc_w as orden,
+		ic."valorDatoPorPeriodo" is not distinct from lag(ic."valorDatoPorPeriodo") over asc_w as repetido,
+		row_number() over (
+			partition by ic.codigo_indicador, ic.fecha
+			order by ic.extraccion_en desc, ic.crudo_id desc
+		) as rn
+	from bccr_sch.indicador_crudo ic
+	join claves c
+		on c.codigo_indicador = ic.codigo_indicador
+		and c.fecha = ic.fecha
+	window asc_w as (
+		partition by ic.codigo_indicador, ic.fecha
+		order by ic.extraccion_en, ic.crudo_id
+	)
+)
+delete from bccr_sch.indicador_crudo ic
+using versiones v
+where ic.crudo_id = v.crudo_id
+  and ic.extraccion_en = v.extraccion_en
+  and ic.extraccion_en >= :desde
+  and ic.extraccion_en < :hasta
+  and v.orden > 1
+  and v.repetido
+  and v.rn > 1;
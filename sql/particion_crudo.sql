@@ -0,0 +1,74 @@
+-- Migración de bccr_sch.indicador_crudo a una tabla particionada por mes de extraccion_en.
+-- Se corre una sola vez. Las particiones de los meses siguientes las crea
+-- `python -m sample.maintenance particiones` (programarla mensualmente).
+-- La llave primaria debe incluir la columna de partición: (crudo_id, extraccion_en).
+
+begin;
+
+alter table bccr_sch.indicador_crudo rename to indicador_crudo_sin_particion;
+alter table bccr_sch.indicador_crudo_sin_particion drop constraint if exists fk_indicador_crudo_catalogo;
+
+create table bccr_sch.indicador_crudo (
+  crudo_id            bigint not null default nextval('bccr_sch.indicador_crudo_crudo_id_seq'),
+  fuente_datos        text not null default 'api_bccr',
+  ingestion_run_id    uuid not null,
+  extraccion_en       timestamptz not null default now(),
+  codigo_indicador    text not null,
+  nombre_indicador    text,
+  fecha               date not null,
+  "valorDatoPorPeriodo"    numeric(20,8),
+  constraint pk_indicador_crudo primary key (crudo_id, extraccion_en)
+) partition by range (extraccion_en);
+
+-- La secuencia pasa a la tabla nueva para que no se borre con la anterior
+alter sequence bccr_sch.indicador_crudo_crudo_id_seq owned by bccr_sch.indicador_crudo.crudo_id;
+
+-- Filas fuera de cualquier mes creado (no debería recibir datos si las particiones están al día)
+create table bccr_sch.indicador_crudo_default partition of bccr_sch.indicador_crudo default;
+
+-- Una partición por mes desde la primera extracción hasta dos meses adelante
+do $$
+declare
+	mes date;
+	inicio date;
+begin
+	select date_trunc('month', coalesce(min(extraccion_en), now()))::date
+	into inicio
+	from bccr_sch.indicador_crudo_sin_particion;
+
+	for mes in
+		select generate_series(inicio, date_trunc('month', now())::date + interval '2 month', interval '1 month')::date
+	loop
+		execute format(
+			'create table if not exists bccr_sch.%I partition of bccr_sch.indicador_crudo for values from (%L) to (%L)',
+			'indicador_crudo_p' || to_char(mes, 'YYYYMM'),
+			mes,
+			(mes + interval '1 month')::date
+		);
+	end loop;
+end$$;
+
+insert into bccr_sch.indicador_crudo (
+	crudo_id, fuente_datos, ingestion_run_id, extraccion_en,
+	codigo_indicador, nombre_indicador, fecha, "valorDatoPorPeriodo"
+)
+select
+	crudo_id, fuente_datos, ingestion_run_id, extraccion_en,
+	codigo_indicador, nombre_indicador, fecha, "valorDatoPorPeriodo"
+from bccr_sch.indicador_crudo_sin_particion;
+
+drop table bccr_sch.indicador_crudo_sin_particion;
+
+-- Los índices del padre se crean en cada partición
+create index if not exists ix_indicador_raw_code_fecha
+	on bccr_sch.indicador_crudo (codigo_indicador, fecha);
+
+create index if not exists ix_indicador_raw_arrival
+	on bccr_sch.indicador_crudo (ingestion_run_id);
+
+alter table bccr_sch.indicador_crudo
+	add constraint fk_indicador_crudo_catalogo
+	foreign key (codigo_indicador)
+	references bccr_sch.catalogo(codigo);
+
+commit;
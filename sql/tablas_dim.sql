@@ -4,8 +4,21 @@ create schema if not exists curado_sch;
 
 create table curado_sch.dim_fecha(
 	date_key integer primary key,
-	fecha date not null unique
+	fecha date not null unique,
+	anio smallint,
+	trimestre smallint,
+	mes smallint,
+	dia smallint,
+	dia_semana smallint,
+	semana_iso smallint,
+	anio_iso smallint,
+	dia_del_anio smallint,
+	es_fin_semana boolean,
+	es_fin_mes boolean,
+	es_fin_trimestre boolean,
+	es_fin_anio boolean
 ); 
+-- El calendario se llena con sql/calendario.sql (`python -m sample.calendario`)
 
 create table curado_sch.dim_indicador(
 	indicador_key bigserial primary key,
@@ -14,3 +14,99 @@ create table if not exists curado_sch.fct_indicador(
 
 create index if not exists ix_fact_indicator_date on curado_sch.fct_indicador(indicador_key, date_key);
 create index if not exists ix_fact_date on curado_sch.fct_indicador(date_key);
+
+-- Marca de agua por indicador: última fecha cargada y estado de la última consulta a la API.
+-- La mantiene el upsert de la tabla de hechos (carga_datos.sql) y el orquestador, así saber qué
+-- indicadores actualizar cuesta O(indicadores) y no O(hechos).
+create table if not exists curado_sch.indicador_watermark(
+	indicador_key bigint primary key references curado_sch.dim_indicador(indicador_key),
+	primera_fecha date, -- primera fecha cargada, para el resumen del app sin recorrer los hechos
+	ultima_fecha date not null,
+	last_run_key integer references curado_sch.dim_run(run_key),
+	ultimo_intento timestamptz, -- última vez que el orquestador consultó la API
+	ultima_respuesta_con_datos timestamptz, -- última vez que la API devolvió datos
+	intentos_vacios integer not null default 0, -- consultas seguidas sin datos nuevos
+	actualizado_en timestamptz not null default now()
+);
+
+-- Carga inicial a partir de los hechos existentes (solo se necesita una vez)
+insert into curado_sch.indicador_watermark (indicador_key, ultima_fecha, last_run_key)
+select
+	fi.indicador_key,
+	max(df.fecha),
+	max(fi.last_run_key)
+from curado_sch.fct_indicador fi
+join curado_sch.dim_fecha df
+	on fi.date_key = df.date_key
+group by fi.indicador_key
+on conflict (indicador_key) do nothing;
+
+-- primera_fecha en bases creadas antes de la columna
+alter table curado_sch.indicador_watermark add column if not exists primera_fecha date;
+
+update curado_sch.indicador_watermark w
+set primera_fecha = p.primera_fecha
+from (
+	select fi.indicador_key, to_date(min(fi.date_key)::text, 'YYYYMMDD') as primera_fecha
+	from curado_sch.fct_indicador fi
+	group by fi.indicador_key
+) p
+where w.indicador_key = p.indicador_key
+  and w.primera_fecha is null;
+
+-- Resumen por código de indicador para el título del app: nombre y periodicidad de la versión
+-- vigente y el rango de fechas cargado. Sale de la marca de agua, una fila por indicador.
+create or replace view curado_sch.indicador_resumen as
+select distinct on (di.codigo_indicador)
+	di.codigo_indicador,
+	di.nombre_indicador,
+	di.periodicidad,
+	min(w.primera_fecha) over (partition by di.codigo_indicador) as primera_fecha,
+	max(w.ultima_fecha) over (partition by di.codigo_indicador) as ultima_fecha
+from curado_sch.indicador_watermark w
+join curado_sch.dim_indicador di
+	on w.indicador_key = di.indicador_key
+order by di.codigo_indicador, di.indicador_key desc;
+
+-- Marca de agua de la curación incremental: último crudo_id ya llevado a las dimensiones y hechos.
+-- Con ella cada carga procesa solo las filas nuevas de indicador_crudo (ver carga_incremental.sql).
+create table if not exists curado_sch.carga_watermark(
+	proceso text primary key,
+	ultimo_crudo_id bigint not null default 0,
+	filas_procesadas bigint not null default 0,
+	actualizado_en timestamptz not null default now()
+);
+
+insert into curado_sch.carga_watermark (proceso, ultimo_crudo_id)
+values ('fct_indicador', 0)
+on conflict (proceso) do nothing;
+
+-- Historial de revisiones (vintages) de cada punto: una fila por valor distinto, válida desde
+-- la corrida que lo trajo. La llena la carga de hechos solo cuando el valor cambia, así
+-- "la serie X según se conocía en la fecha D" sale del índice sin recorrer indicador_crudo.
+create table if not exists curado_sch.fct_indicador_revision(
+	indicador_key bigint not null references curado_sch.dim_indicador(indicador_key),
+	date_key integer not null references curado_sch.dim_fecha(date_key),
+	valid_from_run_key integer not null references curado_sch.dim_run(run_key),
+	valid_from timestamptz not null, -- extraccion_en de la corrida
+	valorind numeric(20,8),
+	constraint pk_fct_indicador_revision primary key (indicador_key, date_key, valid_from_run_key)
+);
+
+-- Consulta as-of: por indicador y fecha, la última revisión con valid_from <= D
+create index if not exists ix_revision_asof
+	on curado_sch.fct_indicador_revision(indicador_key, date_key, valid_from desc)
+	include (valorind);
+
+-- Primera versión a partir de los hechos existentes (solo se necesita una vez)
+insert into curado_sch.fct_indicador_revision (indicador_key, date_key, valid_from_run_key, valid_from, valorind)
+select
+	fi.indicador_key,
+	fi.date_key,
+	fi.last_run_key,
+	dr.extraccion_en,
+	fi.valorind
+from curado_sch.fct_indicador fi
+join curado_sch.dim_run dr
+	on fi.last_run_key = dr.run_key
+on conflict do nothing;
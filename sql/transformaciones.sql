@@ -10,7 +10,9 @@ SELECT *
 FROM mrt_cuenta_ind_cte
 ORDER BY nombre_indicador DESC;
 
-create view curado_sch.mrt_indicadores_disp as
+-- indicador_key y date_key van al final: el app filtra la vista por ellos con parámetros
+-- enlazados y Postgres empuja el filtro hasta el índice (indicador_key, date_key) de fct_indicador
+create or replace view curado_sch.mrt_indicadores_disp as
 with mrt_indicadores_disp_cte AS(
 	SELECT 
 	    dim.codigo_indicador AS "Código de indicador",
@@ -18,7 +20,9 @@ with mrt_indicadores_disp_cte AS(
 	    dim.descripcion_indicador AS "Descripción de indicador",
 	    dim.periodicidad AS "Periodicidad",
 	    fct.valorind AS "Valor de Indicador",
-	    d.fecha AS "Fecha de emisión"
+	    d.fecha AS "Fecha de emisión",
+	    fct.indicador_key,
+	    fct.date_key
 	    FROM curado_sch.fct_indicador fct  
 	    LEFT JOIN curado_sch.dim_indicador dim 
 	        ON fct.indicador_key = dim.indicador_key
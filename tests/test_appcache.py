@@ -0,0 +1,63 @@
+# -------------------------------------------------------------------------------------
+#  Autor: Marco Espinoza — Consultor
+# Laboratorio de Prospectiva, Innovación e Inteligencia Artificial
+# Fecha: 18-10-2026
+# Descripción del archivo: etiquetas de la caché de los loaders de database_conn
+# -------------------------------------------------------------------------------------
+
+from datetime import date
+
+import pytest
+
+from sample import helpers
+
+
+@pytest.fixture
+def llamadas(monkeypatch, tmp_path):
+    """Caché del app sobre SQLite que registra (clave, etiquetas) sin ir a la base."""
+    monkeypatch.setenv("SQL_URL", f"sqlite:///{tmp_path / 'app.db'}")
+    helpers.get_app_engine.clear()
+    helpers.get_app_cache.clear()
+
+    registro = []
+
+    def get_or_load(clave, etiquetas, cargar):
+        registro.append((clave, etiquetas))
+
+    monkeypatch.setattr(helpers.get_app_cache(), "get_or_load", get_or_load)
+    return registro
+
+
+def test_loaders_con_firma_posicional(llamadas):
+    conn = helpers.database_conn()
+
+    conn.load_indicadores()
+    conn.indicador_keys("317")
+    conn.load_resumen("317")
+    conn.load_indicador_data("317", None, date(2020, 1, 1), date(2024, 1, 31))
+    conn.load_indicador_data(None, 42)
+    conn.load_vintage("317", date(2024, 1, 31))
+    conn.load_lista_salarios()
+
+    assert [etiquetas for _, etiquetas in llamadas] == [
+        {None},
+        {"317"},
+        {"317"},
+        {"317"},
+        {("key", 42)},
+        {"317"},
+        {None},
+    ]
+
+
+def test_misma_clave_por_posicion_o_nombre(llamadas):
+    conn = helpers.database_conn()
+
+    conn.load_indicador_data("317")
+    conn.load_indicador_data(codigo_indicador="317")
+    conn.load_vintage("317", date(2024, 1, 31))
+    conn.load_vintage(codigo_indicador="317", as_of=date(2024, 1, 31))
+
+    claves = [clave for clave, _ in llamadas]
+    assert claves[0] == claves[1]
+    assert claves[2] == claves[3]